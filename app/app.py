@@ -18,6 +18,7 @@ if str(ROOT) not in sys.path:
 
 import io
 import json
+import os
 from pathlib import Path
 from typing import Any
 
@@ -25,8 +26,14 @@ import pandas as pd
 import streamlit as st
 
 from src.paths import DATA_DIR, COURSES_CSV, SECTIONS_CSV
-from src.planner import build_schedule
-from src.parse_courses import parse_courses_csv
+from src.catalog import load_catalog, patch_catalog, tables_version
+from src.codes import canonical_codes
+from src.metrics import Metrics
+from src.schedule_cache import ScheduleCache
+from src.seat_feed import read_feed, refresh_seats
+from src.service import PlannerClient
+from src.planner import build_schedule, iter_schedules, parse_request
+from src.parse_courses import parse_courses_csv, summarize_changes, update_courses_csv
 from src import requirements as req
 
 
@@ -57,22 +64,11 @@ def json_default(o: Any):
     return str(o)
 
 
-def unique_codes(codes: list[str]) -> list[str]:
-    seen = set()
-    out: list[str] = []
-    for c in codes:
-        c = (c or "").strip().replace(" ", "")
-        if c and c not in seen:
-            seen.add(c)
-            out.append(c)
-    return out
-
-
 def parse_completed_from_csv(file_bytes: bytes) -> list[str]:
     try:
         df = pd.read_csv(io.BytesIO(file_bytes))
         col = "code" if "code" in df.columns else df.columns[0]
-        return [str(c).strip().replace(" ", "") for c in df[col].dropna().astype(str)]
+        return canonical_codes(df[col].dropna().astype(str))
     except Exception:
         return []
 
@@ -81,9 +77,9 @@ def parse_completed_from_json(file_bytes: bytes) -> list[str]:
     try:
         data = json.loads(file_bytes.decode("utf-8"))
         if isinstance(data, list):
-            return [str(x).strip().replace(" ", "") for x in data]
+            return canonical_codes(data)
         if isinstance(data, dict) and "completed" in data:
-            return [str(x).strip().replace(" ", "") for x in data["completed"]]
+            return canonical_codes(data["completed"])
         return []
     except Exception:
         return []
@@ -106,13 +102,88 @@ def load_profile(name: str) -> dict | None:
     return None
 
 
+# ---------------------------
+# Caching (keyed on the tables' mtime/size, so a rebuild or upload is a new key)
+# ---------------------------
+@st.cache_resource(max_entries=2)
+def cached_catalog(version) -> Any:
+    # shared across sessions: tables, annotated courses and indexes, loaded once
+    return load_catalog(COURSES_CSV, SECTIONS_CSV)
+
+
+@st.cache_data(max_entries=512)
+def cached_progress(version, completed: tuple[str, ...]) -> dict:
+    return req.progress_report(list(completed), cached_catalog(version).annotated)
+
+
+@st.cache_data(max_entries=2)
+def cached_code_list(version) -> list[str]:
+    return sorted(set(cached_catalog(version).courses["code"].dropna().astype(str)))
+
+
+@st.cache_resource
+def schedule_cache() -> ScheduleCache:
+    # planned schedules shared across sessions; drops itself when the tables change
+    return ScheduleCache(maxsize=512)
+
+
+def clear_app_caches():
+    cached_catalog.clear()
+    cached_progress.clear()
+    cached_code_list.clear()
+    schedule_cache().clear()
+
+
 def try_load_tables():
     if COURSES_CSV.exists() and SECTIONS_CSV.exists():
         try:
-            return pd.read_csv(COURSES_CSV), pd.read_csv(SECTIONS_CSV), None
+            return cached_catalog(tables_version(COURSES_CSV, SECTIONS_CSV)), None
         except Exception as e:
-            return None, None, f"Failed reading tables: {e}"
-    return None, None, "Structured tables not found yet."
+            return None, f"Failed reading tables: {e}"
+    return None, "Structured tables not found yet."
+
+
+def render_schedule(result: dict, key: str = ""):
+    # One schedule: table, CSV download, credits and reasons
+    rows: list[dict[str, str]] = []
+    for line in result.get("schedule", []):
+        try:
+            left, right = line.split("|", 1)
+            code_title = left.strip()
+
+            section, tail = [s.strip() for s in right.split("|")]
+            parts = [p for p in tail.split(" ") if p.strip()]
+            days = parts[0] if len(parts) > 0 else ""
+            times = parts[1] if len(parts) > 1 else ""
+            start, end = (times.split("-") + ["", ""])[:2]
+
+            code = code_title.split(" - ")[0].strip()
+            title = code_title.split(" - ")[1].strip() if " - " in code_title else ""
+
+            rows.append({"Code": code, "Title": title, "Section": section, "Days": days, "Start": start, "End": end})
+        except Exception:
+            rows.append({"Code": "", "Title": "", "Section": "", "Days": "", "Start": "", "End": ""})
+            st.write("•", line)
+
+    if rows:
+        df_sched = pd.DataFrame(rows)
+        st.dataframe(df_sched, use_container_width=True)
+
+        csv_buf = io.StringIO()
+        df_sched.to_csv(csv_buf, index=False)
+        st.download_button(
+            "Download schedule as CSV",
+            data=csv_buf.getvalue(),
+            file_name=f"schedule{key}.csv",
+            mime="text/csv",
+            key=f"schedule_csv{key}",
+        )
+
+    st.markdown(f"**Total credits:** {result.get('credits', 0)}")
+
+    with st.expander("🧠 Why these were chosen"):
+        for r in result.get("reasons", []):
+            st.markdown(f"- {r}")
 
 
 # ---------------------------
@@ -177,6 +248,11 @@ st.sidebar.header("1) Course Data")
 st.sidebar.caption(f"Tables path: {COURSES_CSV.name} and {SECTIONS_CSV.name} (stored in data/)")
 
 raw_csv_upload = st.sidebar.file_uploader("Upload raw registrar CSV (optional)", type=["csv"])
+incremental_build = st.sidebar.checkbox(
+    "Only apply changes to existing tables",
+    value=COURSES_CSV.exists() and SECTIONS_CSV.exists(),
+    help="Diff the new export against the current tables by Section and patch what changed.",
+)
 
 if st.sidebar.button("Build tables from uploaded raw CSV", use_container_width=True):
     if raw_csv_upload is None:
@@ -187,8 +263,20 @@ if st.sidebar.button("Build tables from uploaded raw CSV", use_container_width=T
             tmp_raw = DATA_DIR / "_uploaded_raw.csv"
             tmp_raw.write_bytes(raw_csv_upload.getbuffer())
 
-            parse_courses_csv(str(tmp_raw), str(COURSES_CSV), str(SECTIONS_CSV))
-            st.sidebar.success("✅ Built courses_from_csv.csv and sections_from_csv.csv in data/")
+            if incremental_build:
+                previous = tables_version(COURSES_CSV, SECTIONS_CSV)
+                stats = update_courses_csv(str(tmp_raw), str(COURSES_CSV), str(SECTIONS_CSV))
+                patch_catalog(stats["changes"], COURSES_CSV, SECTIONS_CSV, previous=previous)
+                st.sidebar.success(f"✅ Updated tables in data/: {summarize_changes(stats['changes'])}")
+                if stats["changes"]:
+                    with st.sidebar.expander("Change log"):
+                        st.json(stats["changes"])
+            else:
+                stats = parse_courses_csv(str(tmp_raw), str(COURSES_CSV), str(SECTIONS_CSV))
+                st.sidebar.success("✅ Built courses_from_csv.csv and sections_from_csv.csv in data/")
+            st.sidebar.caption(f"{stats['rows']} sections, {stats['courses']} courses "
+                               f"({stats['rows_per_sec']:.0f} rows/s)")
+            clear_app_caches()
         except Exception as e:
             st.sidebar.error(f"Failed to build tables: {e}")
 
@@ -203,13 +291,31 @@ if st.sidebar.button("Save uploaded structured tables", use_container_width=True
             DATA_DIR.mkdir(parents=True, exist_ok=True)
             COURSES_CSV.write_bytes(courses_upload.getbuffer())
             SECTIONS_CSV.write_bytes(sections_upload.getbuffer())
+            clear_app_caches()
             st.sidebar.success("✅ Saved structured tables into data/")
         except Exception as e:
             st.sidebar.error(f"Saving tables failed: {e}")
 
+seat_feed_upload = st.sidebar.file_uploader("Seat feed (JSON lines or CSV, optional)", type=["jsonl", "json", "csv"])
+if st.sidebar.button("Refresh seats from feed", use_container_width=True):
+    if seat_feed_upload is None:
+        st.sidebar.error("Upload a seat feed first.")
+    else:
+        try:
+            feed = read_feed(seat_feed_upload.getvalue(), seat_feed_upload.name)
+            # patches the loaded catalog in place and drops the cached schedules it can change
+            seats = refresh_seats(feed, COURSES_CSV, SECTIONS_CSV, cache=schedule_cache())
+            st.sidebar.success(f"✅ {seats['updated']} sections updated ({seats['opened']} opened, "
+                               f"{seats['closed']} closed); {seats['invalidated']} cached schedules dropped")
+            if seats["unknown"]:
+                st.sidebar.caption(f"{len(seats['unknown'])} feed sections not in the catalog")
+        except Exception as e:
+            st.sidebar.error(f"Seat refresh failed: {e}")
 
-courses_df, sections_df, tables_msg = try_load_tables()
-if courses_df is not None and sections_df is not None:
+
+catalog, tables_msg = try_load_tables()
+courses_df = catalog.courses if catalog is not None else None
+if catalog is not None:
     st.sidebar.success("✅ Structured tables loaded.")
 else:
     st.sidebar.info(f"ℹ️ {tables_msg}")
@@ -269,10 +375,10 @@ user_text = st.sidebar.text_area(
 
 code_list: list[str] = []
 if courses_df is not None and "code" in courses_df.columns:
-    code_list = sorted(set(courses_df["code"].dropna().astype(str)))
+    code_list = cached_code_list(catalog.version)
 
 manual_completed = st.sidebar.multiselect("Or manually pick completed courses:", code_list, default=[])
-completed_codes = unique_codes((completed_from_upload or []) + manual_completed)
+completed_codes = canonical_codes((completed_from_upload or []) + manual_completed)
 st.sidebar.caption(f"Total completed courses counted: {len(completed_codes)}")
 
 st.sidebar.header("4) Constraints")
@@ -280,6 +386,24 @@ colA, colB = st.sidebar.columns(2)
 min_credits = colA.number_input("Min credits", 0, 21, 12, 1)
 max_credits = colB.number_input("Max credits", 0, 21, 15, 1)
 include_capstone = st.sidebar.checkbox("Include Capstone (MGMT4300) if possible")
+optimal_search = st.sidebar.checkbox(
+    "Search for the best schedule (slower)",
+    help="Branch-and-bound search over section choices instead of the greedy planner.",
+)
+top_n = st.sidebar.number_input(
+    "Alternative schedules to show",
+    1, 10, 1, 1,
+    help="Above 1, the ranked best schedules are shown side by side in tabs.",
+)
+show_metrics = st.sidebar.checkbox(
+    "Show planner timings",
+    help="Record per-stage time and candidate/rejection counts for a single schedule.",
+)
+service_url = st.sidebar.text_input(
+    "Planner service URL (optional)",
+    os.environ.get("PLANNER_SERVICE_URL", ""),
+    help="Plan on a running `python -m src.service` (e.g. http://127.0.0.1:8765) instead of in this app.",
+).strip()
 must_include = st.sidebar.multiselect("Must include these course codes:", code_list)
 
 st.sidebar.subheader("Day/Time Preferences")
@@ -296,10 +420,10 @@ progress: dict | None = None
 
 if courses_df is not None:
     try:
-        annotated = req.annotate_courses(courses_df)
-        progress = req.progress_report(completed_codes, annotated)
+        progress = cached_progress(catalog.version, tuple(sorted(completed_codes)))
         missing_business_core = progress.get("business_core_missing", []) or []
-        offered = set(code_list)
+        # catalog codes by id: "ACCT 1011" in the table and "ACCT1011" in the rules are one code
+        offered = catalog.code_table
         recommended_pool = [c for c in missing_business_core if c in offered]
     except Exception as e:
         st.sidebar.warning(f"Could not compute degree progress: {e}")
@@ -355,7 +479,7 @@ run = st.sidebar.button("⚙️ Build Schedule", use_container_width=True)
 
 
 if run:
-    if courses_df is None or sections_df is None:
+    if catalog is None:
         st.error("I need structured tables in data/ (`courses_from_csv.csv` and `sections_from_csv.csv`).")
         st.stop()
 
@@ -377,49 +501,52 @@ if run:
     full_text = (user_text or default_text) + nl_extras
 
     with st.spinner("Building your schedule..."):
-        result = build_schedule(full_text, completed_codes=completed_codes)
+        if service_url:
+            client = PlannerClient(service_url)
+            try:
+                if top_n > 1:
+                    results = client.top_schedules(full_text, completed_codes, k=top_n)
+                else:
+                    results = [client.build_schedule(full_text, completed_codes,
+                                                     mode="optimal" if optimal_search else "greedy",
+                                                     profile=show_metrics)]
+            except Exception as e:
+                st.error(f"Planner service at {service_url} failed: {e}")
+                st.stop()
+        elif top_n > 1:
+            results = list(iter_schedules(parse_request(full_text), completed_codes, k=top_n, catalog=catalog))
+        else:
+            results = [
+                build_schedule(
+                    full_text,
+                    completed_codes=completed_codes,
+                    catalog=catalog,
+                    mode="optimal" if optimal_search else "greedy",
+                    metrics=Metrics() if show_metrics else None,
+                    cache=schedule_cache(),
+                )
+            ]
+    result = results[0]
 
     # ----- Output -----
     st.subheader("✅ Proposed Schedule")
 
-    rows: list[dict[str, str]] = []
-    for line in result.get("schedule", []):
-        try:
-            left, right = line.split("|", 1)
-            code_title = left.strip()
-
-            section, tail = [s.strip() for s in right.split("|")]
-            parts = [p for p in tail.split(" ") if p.strip()]
-            days = parts[0] if len(parts) > 0 else ""
-            times = parts[1] if len(parts) > 1 else ""
-            start, end = (times.split("-") + ["", ""])[:2]
-
-            code = code_title.split(" - ")[0].strip()
-            title = code_title.split(" - ")[1].strip() if " - " in code_title else ""
-
-            rows.append({"Code": code, "Title": title, "Section": section, "Days": days, "Start": start, "End": end})
-        except Exception:
-            rows.append({"Code": "", "Title": "", "Section": "", "Days": "", "Start": "", "End": ""})
-            st.write("•", line)
-
-    if rows:
-        df_sched = pd.DataFrame(rows)
-        st.dataframe(df_sched, use_container_width=True)
-
-        csv_buf = io.StringIO()
-        df_sched.to_csv(csv_buf, index=False)
-        st.download_button(
-            "Download schedule as CSV",
-            data=csv_buf.getvalue(),
-            file_name="schedule.csv",
-            mime="text/csv",
-        )
-
-    st.markdown(f"**Total credits:** {result.get('credits', 0)}")
+    if len(results) > 1:
+        tabs = st.tabs([f"Option {r['rank']}" for r in results])
+        for tab, r in zip(tabs, results):
+            with tab:
+                render_schedule(r, key=f"_option{r['rank']}")
+    else:
+        render_schedule(result)
 
-    with st.expander("🧠 Why these were chosen"):
-        for r in result.get("reasons", []):
-            st.markdown(f"- {r}")
+    if result.get("metrics"):
+        m = result["metrics"]
+        with st.expander(f"⏱️ Planner timings ({m['total_ms']:.1f} ms)"):
+            st.bar_chart(pd.Series(m["stages_ms"], name="ms"))
+            st.write({"counters": m["counters"], "rejected by rule": m["rejected"]})
+    if show_metrics and not service_url:
+        info = schedule_cache().info()
+        st.caption(f"Result cache: {info['hits']} hits, {info['misses']} misses, {info['size']} entries.")
 
     pr = result.get("progress", {})
     if pr:
@@ -440,7 +567,7 @@ if run:
 
     st.download_button(
         "Download result as JSON",
-        data=json.dumps(result, indent=2, default=json_default),
+        data=json.dumps(results if len(results) > 1 else result, indent=2, default=json_default),
         file_name="schedule_result.json",
         mime="application/json",
     )
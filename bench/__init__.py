@@ -0,0 +1,9 @@
+# bench package
+"""
+Performance baseline for the ingestion, catalog, parser, requirements and
+planner hot paths, on the real Fall 2025 export and k-fold synthetic copies.
+
+    python -m bench run [--scales 1,10,100] [--out bench_results.json]
+    python -m bench compare base.json new.json [--threshold 0.15]
+    python -m bench generate --courses 20000 --students 5000 [--config cfg.json]
+"""
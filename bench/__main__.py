@@ -0,0 +1,142 @@
+# __main__.py  (python -m bench ...)
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from bench.stages import STAGES, run_scale
+from bench.synth import generate_raw_csv, make_students, write_students
+
+# a stage/metric pair regresses when it moves this way by more than the threshold
+WORSE_WHEN_HIGHER = {"mean_ms": True, "p50_ms": True, "p90_ms": True, "peak_mem_mb": True,
+                     "throughput_per_s": False}
+# below these, differences are timer/allocator noise and never flagged
+NOISE_MS = 0.05
+NOISE_MB = 0.5
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def cmd_run(args) -> int:
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    stages = [s for s in args.stages.split(",") if s.strip()] if args.stages else STAGES
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"Unknown stages: {', '.join(sorted(unknown))} (expected {', '.join(STAGES)})", file=sys.stderr)
+        return 2
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "students": args.students,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for scale in scales:
+        for stage, metrics in run_scale(scale, stages, students=args.students, seed=args.seed).items():
+            results["results"][f"{scale}x/{stage}"] = metrics
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.out}.")
+    return 0
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[dict]:
+    rows = []
+    for key in sorted(set(base["results"]) & set(new["results"])):
+        old_r, new_r = base["results"][key], new["results"][key]
+        for metric, higher_is_worse in WORSE_WHEN_HIGHER.items():
+            a, b = old_r.get(metric), new_r.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if metric == "peak_mem_mb":
+                worse = worse and max(a, b) >= NOISE_MB
+            else:
+                worse = worse and max(old_r.get("mean_ms", 0), new_r.get("mean_ms", 0)) >= NOISE_MS
+            rows.append({"stage": key, "metric": metric, "base": a, "new": b, "change": change, "regression": worse})
+    return rows
+
+
+def cmd_compare(args) -> int:
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    for field in ("students", "seed"):
+        if base["meta"].get(field) != new["meta"].get(field):
+            print(f"Warning: runs differ in {field} ({base['meta'].get(field)} vs {new['meta'].get(field)}).")
+    rows = compare(base, new, args.threshold)
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['stage']:<22} {r['metric']:<17} {r['base']:12.3f} → {r['new']:12.3f}  {r['change']:+7.1%}  {flag}")
+    for side, data in [("base", base), ("new", new)]:
+        missing = sorted(set(data["results"]) - set((new if side == "base" else base)["results"]))
+        if missing:
+            print(f"Only in {side}: {', '.join(missing)}")
+    bad = [r for r in rows if r["regression"]]
+    print(f"{len(bad)} regression(s) beyond {args.threshold:.0%}.")
+    return 1 if bad else 0
+
+
+def cmd_generate(args) -> int:
+    config = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    if args.courses:
+        config["courses"] = args.courses
+    t0 = time.perf_counter()
+    made = generate_raw_csv(args.out, config, seed=args.seed)
+    print(f"Wrote {args.out}: {made['courses']} courses, {made['sections']} sections "
+          f"({time.perf_counter() - t0:.1f}s).")
+    if args.students:
+        path = args.students_out
+        write_students(path, make_students(made["codes"], args.students, seed=args.seed, by_year=True))
+        print(f"Wrote {path}: {args.students} students.")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Hot-path benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmarks and write JSON results.")
+    run.add_argument("--scales", default="1,10", help="Comma-separated catalog scale factors (e.g. 1,10,100).")
+    run.add_argument("--stages", help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    run.add_argument("--students", type=int, default=100, help="Synthetic students for progress/plan.")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", "-o", default="bench_results.json")
+
+    cmp_ = sub.add_parser("compare", help="Flag regressions between two result files.")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=0.15, help="Relative change that counts (default 0.15).")
+
+    gen = sub.add_parser("generate", help="Write a synthetic registrar export (and students) for scale tests.")
+    gen.add_argument("--courses", type=int, help="Number of courses (default from config, else 1000).")
+    gen.add_argument("--config", help="JSON file overriding bench.synth.DEFAULTS.")
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--out", "-o", default="synthetic_raw.csv")
+    gen.add_argument("--students", type=int, default=0, help="Also write this many student transcripts.")
+    gen.add_argument("--students-out", default="synthetic_students.jsonl", help=".jsonl or .csv")
+
+    args = parser.parse_args(argv)
+    commands = {"run": cmd_run, "compare": cmd_compare, "generate": cmd_generate}
+    return commands[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# corpus.py
+"""
+Realistic schedule requests: free-text asks as students type them, and the
+same asks with the constraint suffix app/app.py appends from its sidebar.
+"""
+
+ASKS = [
+    "15 credits, prefer Tu/Th, avoid Friday, no classes before 10am",
+    "18 credits, avoid Monday",
+    "12-15 credits only tuesdays",
+    "15 credits include capstone, ENGL 1001, no classes before 9:30am",
+    "12 credits",
+    "I need 15 credits, avoid Friday classes, and finish my language requirement",
+    "no classes before 11am and finish by 4pm, 12-16 credits",
+    "avoid monday and wednesday, 9 credits, must include ACCT 1011 and BUSN 1101",
+    "Mondays and Wednesdays preferred, nothing after 5pm",
+    "only Tu/Th please, end by 3:15 pm, 15 credits",
+    "I work mornings so start after 12pm, no fridays, 12 credits",
+    "senior year: capstone MGMT 4300, 15-18 credits, avoid Fri",
+    "prefer MWF, no classes before 9am, done by 2pm",
+    "13 credits with DATA 1101 and its lab DATA 1101L, avoid Sa Su",
+    "need FNCE 2101 and MKTG 1101, 15 credits, no classes earlier than 10:00",
+]
+APP_SUFFIXES = [
+    ", 12-15 credits, no classes before 10:00, finish by 18:00",
+    ", 12-15 credits, avoid Fr, no classes before 10:00, finish by 18:00, prioritize ACCT1012, AETH2291",
+    ", 15-18 credits, include Capstone, avoid Mo We, no classes before 09:00, finish by 17:00",
+]
+CORPUS = ASKS + [a + s for a in ASKS for s in APP_SUFFIXES]
@@ -0,0 +1,46 @@
+# parse_bench.py
+"""
+Micro-benchmark for nlparse.parse_request over the request corpus in
+bench/corpus.py (also the "parse" stage of python -m bench run).
+
+    python bench/parse_bench.py [--repeat N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.corpus import CORPUS
+from src.nlparse import clear_parse_cache, parse_request
+
+def run(repeat: int = 200) -> dict:
+    """Per-parse cost with a cold cache (every text new) and warm (Streamlit reruns)."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        clear_parse_cache()
+        for text in CORPUS:
+            parse_request(text)
+    cold = (time.perf_counter() - t0) / (repeat * len(CORPUS))
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for text in CORPUS:
+            parse_request(text)
+    warm = (time.perf_counter() - t0) / (repeat * len(CORPUS))
+    return {"texts": len(CORPUS), "cold_us": cold * 1e6, "warm_us": warm * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the natural-language request parser.")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    r = run(args.repeat)
+    print(f"{r['texts']} requests: {r['cold_us']:.1f} us/parse cold, {r['warm_us']:.2f} us/parse cached")
+
+
+if __name__ == "__main__":
+    main()
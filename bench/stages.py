@@ -0,0 +1,97 @@
+# stages.py
+"""
+Benchmark stages. Each stage times one call per input (latency percentiles,
+throughput), then replays a few inputs under tracemalloc for peak memory so
+tracing never skews the timings.
+"""
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench.corpus import CORPUS
+from bench.synth import make_students, scale_raw_csv
+from src.catalog import Catalog, load_snapshot, save_snapshot
+from src.nlparse import clear_parse_cache, parse_request
+from src.parse_courses import parse_courses_csv
+from src.paths import RAW_CSV
+from src.planner import build_schedule
+from src.requirements import annotate_courses, clear_progress_cache, progress_report
+
+STAGES = ["ingest", "catalog_csv", "catalog_snapshot", "annotate", "parse", "progress", "plan"]
+
+
+def measure(fn, inputs, repeat: int = 1, mem_samples: int = 3, setup=None) -> dict:
+    """Run fn(x) for every input `repeat` times; `setup` runs once before each pass."""
+    lat = []
+    t_all = time.perf_counter()
+    for _ in range(repeat):
+        if setup:
+            setup()
+        for x in inputs:
+            t0 = time.perf_counter()
+            fn(x)
+            lat.append(time.perf_counter() - t0)
+    total = time.perf_counter() - t_all
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        for x in inputs[:mem_samples]:
+            fn(x)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(lat) * 1000
+    return {
+        "n": len(lat),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "throughput_per_s": len(lat) / total if total else 0.0,
+        "peak_mem_mb": peak / 2**20,
+    }
+
+
+def run_scale(scale: int, stages=STAGES, students: int = 100, seed: int = 0, raw_csv=RAW_CSV, log=print) -> dict:
+    """All requested stages against a `scale`× catalog built from the raw export."""
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        raw = tmp / "raw.csv"
+        rows = scale_raw_csv(raw_csv, scale, raw)
+        courses_csv, sections_csv, snapshot = tmp / "courses.csv", tmp / "sections.csv", tmp / "catalog.pkl"
+        parse_courses_csv(str(raw), str(courses_csv), str(sections_csv))
+        courses, sections = pd.read_csv(courses_csv), pd.read_csv(sections_csv)
+        log(f"scale {scale}x: {rows} raw rows, {len(courses)} courses")
+
+        def stage(name, *args, **kwargs):
+            if name in stages:
+                out[name] = measure(*args, **kwargs)
+                log(f"  {name:<16} p50 {out[name]['p50_ms']:9.2f} ms  "
+                    f"{out[name]['throughput_per_s']:10.1f}/s  peak {out[name]['peak_mem_mb']:7.1f} MB")
+
+        reps = 3 if scale <= 10 else 1
+        stage("ingest", lambda _: parse_courses_csv(str(raw), str(tmp / "c.csv"), str(tmp / "s.csv")),
+              [None], repeat=reps, mem_samples=1)
+        stage("catalog_csv", lambda _: Catalog(pd.read_csv(courses_csv), pd.read_csv(sections_csv)),
+              [None], repeat=reps, mem_samples=1)
+        save_snapshot(Catalog(courses, sections, version="bench"), snapshot)
+        stage("catalog_snapshot", lambda _: load_snapshot(snapshot, "bench"), [None], repeat=reps, mem_samples=1)
+        stage("annotate", lambda _: annotate_courses(courses), [None], repeat=reps, mem_samples=1)
+        stage("parse", parse_request, CORPUS, repeat=5, setup=clear_parse_cache)
+
+        if "progress" in stages or "plan" in stages:
+            catalog = Catalog(courses, sections)
+            pupils = make_students(catalog.code_table.codes, students, seed=seed)
+            stage("progress", lambda s: progress_report(s["completed"], catalog.annotated), pupils,
+                  setup=clear_progress_cache)
+            stage("plan", lambda s: build_schedule(s["request"], s["completed"], catalog=catalog),
+                  pupils, mem_samples=2)
+    return out
@@ -0,0 +1,296 @@
+# synth.py
+"""
+Synthetic inputs for the benchmarks.
+
+scale_raw_csv() grows the real registrar export k-fold: copy 0 is the real
+file, and every further copy renames each subject prefix to a fresh 4-letter
+prefix (ACCT → e.g. AAAB), so the copies are new courses with the real
+section/meeting mix. make_students() draws seeded transcripts and requests.
+
+generate_raw_csv() builds a registrar export from scratch in the exact
+"Updated Analytics Request" schema, from DEFAULTS overridden by a config
+dict (course count, subjects, sections per course, meeting patterns,
+statuses, eligibility rules, enrollment). Same seed + config → same file.
+
+    python -m bench generate --courses 20000 --students 5000 --seed 7 -o big.csv
+"""
+import copy
+import csv
+import json
+import random
+import re
+from itertools import count
+
+from bench.corpus import CORPUS
+from src.codes import canonical_codes
+from src.dolan_core_rules import DOLAN_RULES
+
+PREFIX_RX = re.compile(r"^([A-Z]+)")
+
+
+def letters(n: int, width: int = 4) -> str:
+    out = ""
+    for _ in range(width):
+        n, r = divmod(n, 26)
+        out = chr(ord("A") + r) + out
+    return out
+
+
+def scale_raw_csv(raw_path, factor: int, out_path) -> int:
+    """Write a `factor`× copy of the raw export to `out_path`; returns data rows written."""
+    with open(raw_path, newline="", encoding="latin1") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [r for r in reader if r]
+    col = header.index("Section")
+
+    real = {m.group(1) for r in rows if (m := PREFIX_RX.match(r[col]))}
+    fresh = (p for p in map(letters, count()) if p not in real)
+    ordered = sorted(real)
+
+    n = 0
+    with open(out_path, "w", newline="", encoding="latin1") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for copy in range(factor):
+            rename = {p: next(fresh) for p in ordered} if copy else {}
+            for r in rows:
+                if rename:
+                    r = list(r)
+                    r[col] = PREFIX_RX.sub(lambda m: rename.get(m.group(1), m.group(1)), r[col])
+                writer.writerow(r)
+                n += 1
+    return n
+
+
+def make_students(codes, n: int, seed: int = 0, by_year: bool = False) -> list[dict]:
+    """
+    `n` students in batch format ({"student_id", "completed", "request"}):
+    some Business Core done, plus a handful of other catalog courses. With
+    `by_year`, each student gets a class year 1-4 and a transcript to match
+    (more core and more, higher-level, courses the further along they are).
+    """
+    rng = random.Random(seed)
+    core = list(DOLAN_RULES["business_core"]["required_courses"])
+    codes = sorted(canonical_codes(codes))
+    by_level = {}
+    for c in codes:
+        m = re.search(r"\d", c)
+        by_level.setdefault(int(c[m.start()]) if m else 0, []).append(c)
+    students = []
+    for i in range(n):
+        if by_year:
+            year = rng.randint(1, 4)
+            done = rng.sample(core, min(len(core), rng.randint(3 * (year - 1), 3 * year)))
+            pool = [c for lvl in range(1, year + 1) for c in by_level.get(lvl, [])]
+            done += rng.sample(pool, min(len(pool), rng.randint(4 * (year - 1), 8 * year)))
+        else:
+            done = rng.sample(core, rng.randint(0, len(core)))
+            done += rng.sample(codes, min(len(codes), rng.randint(0, 12)))
+        students.append({"student_id": f"S{i}", "completed": sorted(set(done)), "request": rng.choice(CORPUS)})
+    return students
+
+
+def write_students(path, students: list[dict]) -> None:
+    """JSONL, or CSV (student_id, completed_courses, request) for a .csv path; both read by batch."""
+    if str(path).lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["student_id", "completed_courses", "request"])
+            for s in students:
+                writer.writerow([s["student_id"], ", ".join(s["completed"]), s["request"]])
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for s in students:
+                f.write(json.dumps(s) + "\n")
+
+
+# ---------- from-scratch registrar export ----------
+RAW_COLUMNS = [
+    "Section", "Title", "Offering Period", "Section Status", "Published Instructors (Text)",
+    "Wait List Capacity", "Waitlist Count", "Student Eligibility Rule", "Course Tags",
+    "Meeting Patterns", "Locations", "Actual Enrollment Count",
+]
+
+# weights are relative; every key can be overridden from a JSON config
+DEFAULTS = {
+    "courses": 1000,
+    "term": "Fall Semester 2025",
+    # subject → weight; rule-relevant subjects first so Magis/Dolan areas have candidates
+    "subjects": {
+        "ACCT": 3, "BUSN": 2, "DATA": 2, "ECON": 3, "FNCE": 3, "MGMT": 3, "MKTG": 3, "INTL": 1, "AETH": 1,
+        "ENGL": 6, "HIST": 4, "MATH": 6, "PHIL": 3, "RLST": 3, "SPAN": 2, "FREN": 1, "ITAL": 1, "CHIN": 1,
+        "BIOL": 5, "CHEM": 4, "PHYS": 3, "PSYC": 4, "SOCI": 2, "POLI": 2, "COMM": 2, "ART": 1, "MUSC": 1,
+        "THEA": 1, "FTMA": 1, "NURS": 8, "CPSC": 2, "ENGR": 2, "EDUC": 3,
+    },
+    "include_business_core": True,  # always emit the Dolan Business Core courses
+    "levels": {"1": 35, "2": 25, "3": 20, "4": 10, "5": 8, "6": 2},
+    "units": {"3": 78, "1": 6, "4": 5, "2": 1, "": 10},  # "" → blank Course Tags (0 credits)
+    "extra_tags": {"": 80, "MWAC-Magis Core Writing Across the Curriculum": 8, "Graduate - Master's": 8,
+                   "Exclude CAT": 4},
+    "sections_per_course": {"1": 58, "2": 18, "3": 10, "4": 6, "6": 5, "10": 3},
+    "meeting": {
+        "tba": 0.2,  # blank Meeting Patterns (online/arranged)
+        "multi_line": 0.02,  # several date-ranged lines, like labs/weekend courses
+        # day pattern → [weight, minutes per meeting]
+        "days": {"MR": [44, 75], "TF": [38, 75], "TR": [5, 75], "MW": [4, 75], "W": [27, 150], "T": [14, 150],
+                 "R": [14, 150], "M": [13, 150], "F": [5, 150], "MWR": [2, 50], "TWF": [2, 50],
+                 "MTWRF": [1, 50], "MWF": [1, 50]},
+        "starts": {"8:00": 6, "9:30": 14, "11:00": 16, "12:30": 16, "14:00": 14, "15:30": 12, "17:00": 8,
+                   "18:30": 6, "19:00": 3},
+    },
+    "status": {"Open": 49, "Closed": 34, "Waitlist": 9, "Canceled": 8},
+    "capacity": [15, 40],  # uniform seats per section
+    "waitlist_capacity": {"0": 82, "5": 7, "10": 5, "20": 3, "3": 2, "1": 1},
+    "eligibility": {
+        "none": 47,
+        "prereq": 33,  # CM_PRE_UG_<earlier course in the subject> ("and"/"or" combos)
+        "standing": 12,
+        "program": 8,
+    },
+    "standing_rules": ["CM_PRE_UG_has completed or is in the process of completing 54 semester credits",
+                       "CM_PRE_UG_Junior or Senior Standing", "CM_PRE_UG_Senior Standing"],
+    "program_rules": ["CM_PRE_Dolan School of Business POS", "CM_PRE_UG_Bellarmine Students",
+                      "CM_PRE_UG_is Nursing Undergraduate Major", "CM_PRE_Excludes Non-Degree SEHD Graduate Students"],
+    "online_share": 0.1,
+    "buildings": ["BNW", "DSB", "CNS", "BCC", "DMH", "CAN", "MCA", "EGW", "BLM"],
+    "no_instructor": 0.06,
+    "co_taught": 0.05,
+}
+
+FIRST = ["Alex", "Casey", "Jordan", "Taylor", "Morgan", "Riley", "Jamie", "Avery", "Quinn", "Rowan",
+         "Sarah", "David", "Maria", "Wei", "Priya", "Omar", "Elena", "Kwame", "Hannah", "Luis"]
+LAST = ["Murray", "Nguyen", "Patel", "Garcia", "Smith", "Okafor", "Rossi", "Kim", "Cohen", "Reilly",
+        "Bollinger", "Church", "Phelan", "Gerry", "Santos", "Novak", "Hughes", "Ward", "Ibrahim", "Lee"]
+WORDS = ["Foundations of", "Topics in", "Introduction to", "Advanced", "Seminar in", "Methods in",
+         "Principles of", "Studies in", "Research in", "Applied"]
+
+
+def merged_config(overrides: dict | None = None) -> dict:
+    """DEFAULTS with `overrides` applied (nested dicts merge one level deep)."""
+    cfg = copy.deepcopy(DEFAULTS)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(cfg.get(key), dict):
+            cfg[key].update(value)
+        else:
+            cfg[key] = value
+    return cfg
+
+
+def pick(rng: random.Random, weights: dict):
+    keys = list(weights)
+    return rng.choices(keys, weights=[weights[k] for k in keys])[0]
+
+
+def clock(minutes: int) -> str:
+    # 750 → "12:30 PM", the export's 12-hour style
+    h, m = divmod(minutes % (24 * 60), 60)
+    return f"{(h - 1) % 12 + 1}:{m:02d} {'AM' if h < 12 else 'PM'}"
+
+
+def meeting_pattern(rng: random.Random, meeting: dict) -> str:
+    if rng.random() < meeting["tba"]:
+        return ""
+    lines = rng.randint(2, 4) if rng.random() < meeting["multi_line"] else 1
+    out = []
+    for _ in range(lines):
+        days = pick(rng, {d: w for d, (w, _) in meeting["days"].items()})
+        length = meeting["days"][days][1]
+        h, m = map(int, pick(rng, meeting["starts"]).split(":"))
+        start = h * 60 + m
+        line = f"{days} | {clock(start)} - {clock(start + length)}"
+        if lines > 1:
+            line += " | 09/02/2025 - 12/17/2025"
+        out.append(line)
+    return "\n\n".join(out)
+
+
+def generate_courses(rng: random.Random, cfg: dict) -> list[tuple[str, str, str]]:
+    """(subject, number, title) per course, in subject/number order."""
+    seen = set()
+    if cfg["include_business_core"]:
+        for code in DOLAN_RULES["business_core"]["required_courses"]:
+            m = re.match(r"([A-Z]+)(\d+\w*)", code)
+            seen.add((m.group(1), m.group(2)))
+    subjects = cfg["subjects"]
+    # codes the loop below can draw: subject × level digit × 000-999, zero weights never drawn
+    subj_pool = {s for s, w in subjects.items() if w > 0}
+    level_pool = {lv for lv, w in cfg["levels"].items() if w > 0}
+    outside = sum(1 for s, n in seen if s not in subj_pool or not (len(n) == 4 and n[0] in level_pool))
+    available = len(subj_pool) * len(level_pool) * 1000 + outside
+    if cfg["courses"] > available:
+        raise ValueError(f"courses={cfg['courses']} but the subjects and levels only allow {available} distinct codes")
+    while len(seen) < cfg["courses"]:
+        subj = pick(rng, subjects)
+        number = f"{pick(rng, cfg['levels'])}{rng.randint(0, 999):03d}"
+        seen.add((subj, number))
+    return [(s, n, f"{rng.choice(WORDS)} {s.title()} {n[0]}") for s, n in sorted(seen)]
+
+
+def eligibility(rng: random.Random, cfg: dict, subject: str, number: str, earlier: list[str]) -> str:
+    kind = pick(rng, cfg["eligibility"])
+    if kind == "prereq" and earlier:
+        tier = "GR" if number[0] >= "5" else "UG"
+        picks = rng.sample(earlier, min(len(earlier), rng.choice([1, 1, 1, 2])))
+        joiner = rng.choice([" and ", " or "])
+        return f"CM_PRE_{tier}_" + joiner.join(f"{subject} {p}" for p in picks)
+    if kind == "standing":
+        return rng.choice(cfg["standing_rules"])
+    if kind == "program":
+        return rng.choice(cfg["program_rules"])
+    return ""
+
+
+def generate_raw_csv(out_path, config: dict | None = None, seed: int = 0) -> dict:
+    """
+    Write a synthetic registrar export to `out_path`. Returns {"courses",
+    "sections", "codes"} (codes as "ACCT 1011", for make_students).
+    """
+    cfg = merged_config(config)
+    rng = random.Random(seed)
+    courses = generate_courses(rng, cfg)
+    lo_cap, hi_cap = cfg["capacity"]
+    earlier_by_subject: dict[str, list[str]] = {}
+    n_sections = 0
+    with open(out_path, "w", newline="", encoding="latin1") as f:
+        writer = csv.writer(f)
+        writer.writerow(RAW_COLUMNS)
+        for subject, number, title in courses:
+            units = pick(rng, cfg["units"])
+            tags = f"{units} Credit Hour{'s' if units != '1' else ''}" if units else ""
+            extra = pick(rng, cfg["extra_tags"])
+            if extra:
+                tags = f"{tags}\n\n{extra}" if tags else extra
+            earlier = earlier_by_subject.setdefault(subject, [])
+            rule = eligibility(rng, cfg, subject, number, earlier)
+            for k in range(1, int(pick(rng, cfg["sections_per_course"])) + 1):
+                status = pick(rng, cfg["status"])
+                capacity = rng.randint(lo_cap, hi_cap)
+                wl_cap = int(pick(rng, cfg["waitlist_capacity"]))
+                if status == "Canceled":
+                    enrolled = 0
+                elif status in ("Closed", "Waitlist"):
+                    enrolled = capacity
+                else:
+                    enrolled = rng.randint(0, capacity - 1)
+                waitlisted = rng.randint(1, wl_cap) if status == "Waitlist" and wl_cap else 0
+                if rng.random() < cfg["no_instructor"]:
+                    instructors = ""
+                else:
+                    names = [f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+                             for _ in range(2 if rng.random() < cfg["co_taught"] else 1)]
+                    instructors = ", ".join(names)
+                pattern = meeting_pattern(rng, cfg["meeting"])
+                if not pattern and rng.random() < cfg["online_share"] * 5:
+                    location = "Fairfield Online"
+                elif pattern:
+                    location = f"{rng.choice(cfg['buildings'])} {rng.randint(1, 4)}{rng.randint(0, 60):02d}"
+                else:
+                    location = ""
+                writer.writerow([
+                    f"{subject} {number}-{k:02d} - {title}", title, cfg["term"], status, instructors,
+                    wl_cap, waitlisted, rule, tags, pattern, location, enrolled,
+                ])
+                n_sections += 1
+            earlier.append(number)
+    return {"courses": len(courses), "sections": n_sections, "codes": [f"{s} {n}" for s, n, _ in courses]}
@@ -0,0 +1,176 @@
+# batch.py
+"""
+Whole-cohort scheduling: plan every student in a file with one catalog load.
+
+Students come from JSONL ({"student_id", "completed", "request"}) or CSV
+(student_id, completed_courses as "ACCT1011, BUSN1101, ...", optional
+request). Results stream out as JSONL, one line per student, in input order.
+"""
+import csv
+import gc
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.catalog import load_catalog
+from src.codes import canonical_codes
+from src.paths import COURSES_CSV, SECTIONS_CSV
+from src.planner import build_schedule
+from src.schedule_cache import ScheduleCache
+
+DEFAULT_REQUEST = "15 credits, prefer Tu/Th, avoid Friday, no classes before 10am"
+
+# set in the parent before forking so every worker shares it copy-on-write
+_CATALOG = None
+_OPTIONS = {}
+_CACHE = None  # per-process ScheduleCache (its SQLite file, if any, is shared)
+
+
+# ---------- input ----------
+def split_codes(value) -> list[str]:
+    if isinstance(value, list):
+        return canonical_codes(value)
+    return canonical_codes(str(value or "").split(","))
+
+
+def read_students(path) -> list[dict]:
+    students = []
+    if str(path).lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                students.append({
+                    "student_id": row.get("student_id") or str(i),
+                    "completed": split_codes(row.get("completed_courses") or row.get("completed")),
+                    "request": row.get("request") or DEFAULT_REQUEST,
+                })
+    else:
+        with open(path, encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                students.append({
+                    "student_id": rec.get("student_id", str(i)),
+                    "completed": split_codes(rec.get("completed", [])),
+                    "request": rec.get("request") or DEFAULT_REQUEST,
+                })
+    return students
+
+
+def json_default(o):
+    if isinstance(o, set):
+        return sorted(o)
+    return str(o)
+
+
+# ---------- workers ----------
+def _init_worker(courses_csv, sections_csv, options, cache_db):
+    # spawn-only platforms: each worker loads its own copy once
+    global _CATALOG, _OPTIONS, _CACHE
+    if _CATALOG is None:
+        _CATALOG = load_catalog(courses_csv, sections_csv)
+    if _CACHE is None:
+        _CACHE = ScheduleCache(db_path=cache_db)
+    _OPTIONS = options
+
+
+def plan_student(student: dict) -> dict:
+    try:
+        result = build_schedule(student["request"], completed_codes=student["completed"],
+                                catalog=_CATALOG, cache=_CACHE, **_OPTIONS)
+        return {"student_id": student["student_id"], **result}
+    except Exception as e:
+        return {"student_id": student["student_id"], "error": str(e)}
+
+
+def run_batch(students, catalog=None, workers=None, mode="greedy", time_budget=2.0,
+              courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV, chunksize=8, cache_db=None):
+    """
+    Yield one result dict per student, in input order. `workers=1` plans
+    in-process; otherwise a ProcessPoolExecutor fans out across cores.
+    Identical requests reuse results (schedule_cache), persisted across runs
+    in the SQLite file `cache_db` when given.
+    """
+    global _CATALOG, _OPTIONS, _CACHE
+    _CATALOG = catalog or load_catalog(courses_csv, sections_csv)
+    _OPTIONS = {"mode": mode, "time_budget": time_budget}
+    _CACHE = ScheduleCache(db_path=cache_db)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for s in students:
+            yield plan_student(s)
+        return
+
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    if ctx is not None:
+        # keep the shared catalog's pages untouched by the workers' GC passes
+        gc.collect()
+        gc.freeze()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(str(courses_csv), str(sections_csv), _OPTIONS, cache_db)) as pool:
+            yield from pool.map(plan_student, students, chunksize=chunksize)
+    finally:
+        if ctx is not None:
+            gc.unfreeze()
+
+
+def write_jsonl(results, out) -> int:
+    n = 0
+    for r in results:
+        out.write(json.dumps(r, default=json_default) + "\n")
+        out.flush()
+        n += 1
+    return n
+
+
+# ---------- CLI (python -m src.bot batch ...) ----------
+def add_batch_args(parser):
+    parser.add_argument("students", help="Students file: .jsonl (student_id, completed, request) or .csv")
+    parser.add_argument("--out", "-o", help="Write JSONL results here (default: stdout).")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--optimal", action="store_true", help="Use the branch-and-bound search per student.")
+    parser.add_argument("--time-budget", type=float, default=2.0, help="Per-student search budget for --optimal.")
+    parser.add_argument("--allocate", action="store_true",
+                        help="Allocate seats across the whole cohort (respects section capacity).")
+    parser.add_argument("--policy", choices=["round_robin", "priority"], default="round_robin",
+                        help="--allocate order: fair rounds, or file order as priority.")
+    parser.add_argument("--report", help="With --allocate: write section fill + shortfalls JSON here.")
+    parser.add_argument("--cache", metavar="DB", help="SQLite file to keep schedule results in across runs.")
+
+
+def batch_main(args, courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV) -> int:
+    students = read_students(args.students)
+    t0 = time.perf_counter()
+    if args.allocate:
+        from src.cohort import allocate_cohort
+
+        alloc = allocate_cohort(students, load_catalog(courses_csv, sections_csv), policy=args.policy)
+        report = {"sections": alloc["sections"], "shortfalls": alloc["shortfalls"]}
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, default=json_default)
+        else:
+            print(f"{len(alloc['sections'])} sections used, {len(alloc['shortfalls'])} students short of "
+                  f"their credit floor.", file=sys.stderr)
+        results = iter(alloc["students"])
+    else:
+        results = run_batch(students, workers=args.workers, mode="optimal" if args.optimal else "greedy",
+                            time_budget=args.time_budget, courses_csv=courses_csv, sections_csv=sections_csv,
+                            cache_db=args.cache)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            n = write_jsonl(results, f)
+    else:
+        n = write_jsonl(results, sys.stdout)
+    dt = time.perf_counter() - t0
+    print(f"Planned {n} students in {dt:.2f}s ({n / dt if dt else 0:.1f}/s).", file=sys.stderr)
+    if not args.allocate and _CACHE.info()["lookups"]:
+        # counted for in-process runs (--workers 1); pool workers keep their own
+        info = _CACHE.info()
+        print(f"Result cache: {info['hits'] + info['disk_hits']} hits, {info['misses']} misses.", file=sys.stderr)
+    return 0
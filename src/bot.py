@@ -4,17 +4,23 @@ import os
 import sys
 import json
 
-# Local imports (assumes bot.py sits next to planner.py, parse_courses.py, etc.)
+# Local imports: the repo root, so src.* resolves when run as src/bot.py
 HERE = os.path.dirname(os.path.abspath(__file__))
-if HERE not in sys.path:
-    sys.path.insert(0, HERE)
+ROOT = os.path.dirname(HERE)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-import planner as pl  # your main scheduler
-import parse_courses as pc  # to regenerate tables if needed
+# Only the path constants load at import time; pandas, the planner and the
+# catalog are imported by the commands that need them, so --help and errors
+# are instant and a query pays for exactly one catalog load (from the
+# snapshot below when the tables haven't changed).
+from src import paths
 
-COURSES_CSV = os.path.join(HERE, "courses_from_csv.csv")
-SECTIONS_CSV = os.path.join(HERE, "sections_from_csv.csv")
-RAW_CSV_DEFAULT = os.path.join(HERE, "Updated Analytics Request Fall 2025.csv")
+COURSES_CSV = str(paths.COURSES_CSV)
+SECTIONS_CSV = str(paths.SECTIONS_CSV)
+RAW_CSV_DEFAULT = str(paths.RAW_CSV)
+SNAPSHOT = str(paths.CATALOG_SNAPSHOT)
+DEFAULT_REQUEST = "15 credits, prefer Tu/Th, avoid Friday, no classes before 10am"
 
 def _t2m_safe(t):
     """Safer time parser: tolerates blanks/TBA and returns None."""
@@ -29,13 +35,27 @@ def _t2m_safe(t):
     except Exception:
         return None
 
+def _json_default(o):
+    """Planner prefs hold sets; emit them as sorted lists."""
+    if isinstance(o, set):
+        return sorted(o)
+    return str(o)
+
 def patch_planner_time_parser():
-    """Monkey-patch planner.t2m to the safer version so overlap() won't crash."""
+    """Monkey-patch planner.t2m to the safer version so odd time strings in a request won't crash the rules."""
     try:
+        from src import planner as pl
+
         pl.t2m = _t2m_safe
     except Exception:
         pass
 
+def load_catalog():
+    """The catalog for COURSES_CSV/SECTIONS_CSV, via the pickled snapshot when it is current."""
+    from src import catalog as ct
+
+    return ct.load_catalog(COURSES_CSV, SECTIONS_CSV, snapshot=SNAPSHOT)
+
 def ensure_tables(raw_csv=None, quiet=False):
     """
     Ensure courses_from_csv.csv and sections_from_csv.csv exist.
@@ -54,14 +74,18 @@ def ensure_tables(raw_csv=None, quiet=False):
             print(" - Expected:", COURSES_CSV)
             print(" - Expected:", SECTIONS_CSV)
             print(" - Missing raw CSV to regenerate:", raw_csv)
-            print("Fix: Place your 'Updated Analytics Request Fall 2025.csv' next to bot.py or pass --raw path.")
+            print("Fix: Place your 'Updated Analytics Request Fall 2025.csv' in data/ or pass --raw path.")
         return False
 
     # attempt to regenerate
     try:
-        pc.parse_courses_csv(raw_csv, COURSES_CSV, SECTIONS_CSV)
+        from src import parse_courses as pc
+
+
+        stats = pc.parse_courses_csv(raw_csv, COURSES_CSV, SECTIONS_CSV)
         if not quiet:
             print(f"Regenerated tables from raw CSV:\n - {COURSES_CSV}\n - {SECTIONS_CSV}")
+            print(f"Parsed {stats['rows']} rows ({stats['rows_per_sec']:.0f} rows/s).")
         return True
     except Exception as e:
         if not quiet:
@@ -69,55 +93,84 @@ def ensure_tables(raw_csv=None, quiet=False):
             print("Reason:", e)
         return False
 
-def main(argv=None):
+def batch_main(argv):
+    """`bot.py batch students.jsonl --out results.jsonl`: plan a whole cohort."""
     parser = argparse.ArgumentParser(
-        description="Natural-language scheduler bot for Fairfield course planning (prototype)."
+        prog="bot.py batch",
+        description="Plan schedules for every student in a file; results stream out as JSONL."
     )
-    parser.add_argument("request", nargs="*", help="Natural-language request, e.g., '15 credits, Tu/Th, avoid Friday, no classes before 10am'")
-    parser.add_argument("--completed", "-c", action="append", default=[],
-                        help="Previously completed course codes (repeatable). e.g., -c ENGL1001 -c MATH1121")
+    from src import batch as bt
+
+    bt.add_batch_args(parser)
     parser.add_argument("--raw", help="Path to raw registrar CSV (if tables need regeneration).")
-    parser.add_argument("--json", action="store_true", help="Output full JSON instead of pretty text.")
     args = parser.parse_args(argv)
 
-    user_text = " ".join(args.request).strip() or "15 credits, prefer Tu/Th, avoid Friday, no classes before 10am"
-
-    # Make sure CSVs exist (or can be built)
     if not ensure_tables(raw_csv=args.raw, quiet=False):
         sys.exit(2)
+    return bt.batch_main(args, COURSES_CSV, SECTIONS_CSV)
 
-    # Patch planner's time parser for robustness
-    patch_planner_time_parser()
+def plan(user_text, completed, catalog, optimal=False, top=0, time_budget=2.0, profile=False, cache=None):
+    """Results for one request: [build_schedule result], or the ranked top-N."""
+    from src import planner as pl
 
-    # Build schedule
-    try:
-        result = pl.build_schedule(user_text, completed_codes=args.completed)
-    except Exception as e:
-        print("ERROR: build_schedule failed.")
-        print("Reason:", e)
-        sys.exit(1)
+    if top:
+        return list(pl.iter_schedules(pl.parse_request(user_text), completed, k=top,
+                                      catalog=catalog, time_budget=time_budget))
+    if profile:
+        from src.metrics import Metrics
+    return [pl.build_schedule(user_text, completed_codes=completed, catalog=catalog,
+                              mode="optimal" if optimal else "greedy", time_budget=time_budget,
+                              metrics=Metrics() if profile else None, cache=cache)]
+
+def roadmap(user_text, completed, catalog, time_budget=2.0, max_terms=8):
+    """Term-by-term roadmap; the request's credit window applies to every term."""
+    from src.nlparse import parse_request
+    from src.roadmap import plan_roadmap
+
+    prefs = parse_request(user_text)
+    return plan_roadmap(completed, catalog, prefs["min_credits"], prefs["max_credits"], max_terms, time_budget)
 
-    if args.json:
-        print(json.dumps(result, indent=2))
-        return 0
+def print_roadmap(result, completed, as_json=False):
+    if as_json:
+        print(json.dumps(result, indent=2, default=_json_default))
+        return
+    from src.roadmap import format_roadmap
+
+    if completed:
+        print("Completed:", ", ".join(completed))
+    for line in format_roadmap(result):
+        print(line)
+
+def print_results(results, user_text, completed, as_json=False, top=0):
+    if as_json:
+        print(json.dumps(results if top else results[0], indent=2, default=_json_default))
+        return
 
     # Pretty print
     print("Request:", user_text)
-    if args.completed:
-        print("Completed:", ", ".join(args.completed))
+    if completed:
+        print("Completed:", ", ".join(completed))
 
-    print("\nProposed schedule:")
-    if not result.get("schedule"):
-        print("  (no feasible schedule found given constraints)")
-    else:
-        for line in result["schedule"]:
-            print(" ", line)
+    for result in results:
+        if "rank" in result:
+            print(f"\n=== Option {result['rank']} ===")
+        print("\nProposed schedule:")
+        if not result.get("schedule"):
+            print("  (no feasible schedule found given constraints)")
+        else:
+            for line in result["schedule"]:
+                print(" ", line)
 
-    print("Total credits:", result.get("credits", 0))
+        print("Total credits:", result.get("credits", 0))
 
-    print("\nWhy chosen:")
-    for r in result.get("reasons", []):
-        print(" -", r)
+        print("\nWhy chosen:")
+        for r in result.get("reasons", []):
+            print(" -", r)
+
+    if not results:
+        print("\n(no feasible schedule found given constraints)")
+        return
+    result = results[0]
 
     pr = result.get("progress", {})
     if pr:
@@ -128,6 +181,136 @@ def main(argv=None):
         print("  Magis Orientation unmet:", mag.get("orientation", []))
         print("  Magis Exploration unmet:", mag.get("exploration", []))
 
+def print_profile(results, top=0):
+    if top:
+        print("Profile: --profile covers single-schedule runs; ignored with --top.", file=sys.stderr)
+        return
+    from src.metrics import format_metrics
+
+    print("Profile:", file=sys.stderr)
+    for line in format_metrics(results[0]["metrics"]):
+        print(" ", line, file=sys.stderr)
+
+REPL_HELP = """Type a request (e.g. '15 credits, avoid Friday'), or a command:
+  :completed CODES   replace completed courses (comma/space separated; empty clears)
+  :add CODES         add completed courses
+  :optimal on|off    branch-and-bound search instead of greedy
+  :top N             show N ranked alternatives (0 = single schedule)
+  :json on|off       full JSON output
+  :profile on|off    per-stage timings
+  :help              this text
+  :quit              exit"""
+
+def split_codes(text):
+    return [c for c in text.replace(",", " ").split() if c]
+
+def repl(args, catalog):
+    """Answer requests line by line with the catalog loaded once; repeats come from a result cache."""
+    from src.schedule_cache import ScheduleCache
+
+    cache = ScheduleCache()
+    opts = {"completed": list(args.completed), "optimal": args.optimal, "top": args.top,
+            "json": args.json, "profile": args.profile}
+    print(f"Catalog loaded ({len(catalog.courses)} courses). :help for commands, :quit to exit.")
+    while True:
+        try:
+            line = input("bot> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return 0
+        if not line:
+            continue
+        if line.startswith(":"):
+            cmd, _, rest = line[1:].partition(" ")
+            rest = rest.strip()
+            if cmd in ("q", "quit", "exit"):
+                return 0
+            if cmd == "help":
+                print(REPL_HELP)
+            elif cmd == "completed":
+                opts["completed"] = split_codes(rest)
+                print("Completed:", ", ".join(opts["completed"]) or "(none)")
+            elif cmd == "add":
+                opts["completed"] += [c for c in split_codes(rest) if c not in opts["completed"]]
+                print("Completed:", ", ".join(opts["completed"]) or "(none)")
+            elif cmd in ("optimal", "json", "profile"):
+                opts[cmd] = rest.lower() in ("on", "1", "yes", "true", "")
+                print(f"{cmd}: {'on' if opts[cmd] else 'off'}")
+            elif cmd == "top" and rest.isdigit():
+                opts["top"] = int(rest)
+                print(f"top: {opts['top']}")
+            else:
+                print(f"Unknown command: {line} (:help for commands)")
+            continue
+        try:
+            results = plan(line, opts["completed"], catalog, opts["optimal"], opts["top"], args.time_budget,
+                           opts["profile"], cache)
+        except Exception as e:
+            print("ERROR: build_schedule failed.")
+            print("Reason:", e)
+            continue
+        print_results(results, line, opts["completed"], opts["json"], opts["top"])
+        if opts["profile"]:
+            print_profile(results, opts["top"])
+        print()
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        return batch_main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Natural-language scheduler bot for Fairfield course planning (prototype).",
+        epilog="Cohort runs: bot.py batch students.jsonl --out results.jsonl [--workers N]",
+    )
+    parser.add_argument("request", nargs="*", help="Natural-language request, e.g., '15 credits, Tu/Th, avoid Friday, no classes before 10am'")
+    parser.add_argument("--completed", "-c", action="append", default=[],
+                        help="Previously completed course codes (repeatable). e.g., -c ENGL1001 -c MATH1121")
+    parser.add_argument("--raw", help="Path to raw registrar CSV (if tables need regeneration).")
+    parser.add_argument("--json", action="store_true", help="Output full JSON instead of pretty text.")
+    parser.add_argument("--optimal", action="store_true",
+                        help="Use the branch-and-bound search instead of the greedy planner.")
+    parser.add_argument("--time-budget", type=float, default=2.0,
+                        help="Seconds the --optimal/--top search may spend before returning its best schedule.")
+    parser.add_argument("--top", type=int, default=0, metavar="N",
+                        help="Show the N best alternative schedules, ranked (uses the exact search).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each planner stage and log counters to stderr (single-schedule runs).")
+    parser.add_argument("--roadmap", type=int, nargs="?", const=8, default=0, metavar="TERMS",
+                        help="Plan term by term to the end of the Business Core and Magis (at most TERMS "
+                             "terms, default 8) using the request's credit window.")
+    parser.add_argument("--repl", action="store_true",
+                        help="Interactive mode: load the catalog once, then answer one request per line.")
+    args = parser.parse_args(argv)
+
+    user_text = " ".join(args.request).strip() or DEFAULT_REQUEST
+
+    # Make sure CSVs exist (or can be built)
+    if not ensure_tables(raw_csv=args.raw, quiet=False):
+        sys.exit(2)
+
+    # Patch planner's time parser for robustness
+    patch_planner_time_parser()
+
+    # Build schedule(s)
+    try:
+        catalog = load_catalog()
+        if args.repl:
+            return repl(args, catalog)
+        if args.roadmap:
+            print_roadmap(roadmap(user_text, args.completed, catalog, args.time_budget, args.roadmap),
+                          args.completed, args.json)
+            return 0
+        results = plan(user_text, args.completed, catalog, args.optimal, args.top, args.time_budget, args.profile)
+    except Exception as e:
+        print("ERROR: build_schedule failed.")
+        print("Reason:", e)
+        sys.exit(1)
+
+    if args.profile:
+        print_profile(results, args.top)
+
+    print_results(results, user_text, args.completed, args.json, args.top)
     return 0
 
 if __name__ == "__main__":
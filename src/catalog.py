@@ -0,0 +1,317 @@
+# catalog.py
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.codes import CodeTable
+from src.dolan_core_rules import DOLAN_RULES
+from src.magis_core_rules import MAGIS_RULES
+from src.paths import COURSES_CSV, SECTIONS_CSV
+from src.prereqs import PrereqIndex
+from src.requirements import annotate_courses, area_index
+from src.timeslots import day_mask, occupancy, to_minutes
+
+OFFERING_COLS = ["course_id", "code", "title", "units"]
+# section columns a change log can update in place (only the open/waitlist masks depend on them)
+PATCHABLE_FIELDS = {"capacity", "seats_taken", "status", "waitlist_capacity", "waitlist_count"}
+TEXT_FIELDS = {"status"}
+# registrar statuses nobody can register into directly, whatever the seat counts say
+CLOSED_STATUSES = frozenset({"Closed", "Waitlist", "Canceled"})
+SNAPSHOT_FORMAT = 6  # bump when Catalog's attributes change
+
+
+def add_time_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach integer day bitmasks, start/end minutes and weekly slot occupancy
+    masks, parsed once per distinct string.
+    """
+    df = df.copy()
+    df["day_mask"] = df["days"].map({d: day_mask(d) for d in df["days"].unique()}).astype("int64")
+    for col, out in [("start_time", "start_min"), ("end_time", "end_min")]:
+        df[out] = df[col].map({t: to_minutes(t) for t in df[col].unique()}).astype("int64")
+    df["slot_mask"] = pd.Series(
+        [occupancy(int(d), int(s), int(e)) for d, s, e in zip(df["day_mask"], df["start_min"], df["end_min"])],
+        index=df.index, dtype=object,
+    )
+    return df
+
+
+def open_mask(off: pd.DataFrame) -> np.ndarray:
+    """Offerings rows a student can register into now: a seat left and not closed, waitlisted or canceled."""
+    ok = off["seats_taken"].fillna(0).to_numpy() < off["capacity"].fillna(0).to_numpy()
+    if "status" in off:
+        ok &= ~off["status"].isin(CLOSED_STATUSES).to_numpy()
+    return ok
+
+
+def waitlist_mask(off: pd.DataFrame) -> np.ndarray:
+    """Waitlisted offerings rows that still have waitlist room."""
+    if "status" not in off:
+        return np.zeros(len(off), dtype=bool)
+    return ((off["status"] == "Waitlist").to_numpy()
+            & (off["waitlist_count"].fillna(0).to_numpy() < off["waitlist_capacity"].fillna(0).to_numpy()))
+
+
+class Course:
+    """One course as a compact record (Catalog.course_records)."""
+    __slots__ = ("course_id", "code", "title", "units")
+
+    def __init__(self, course_id, code, title, units):
+        self.course_id = course_id
+        self.code = code
+        self.title = title
+        self.units = units
+
+
+class Offering:
+    """
+    One Catalog.offerings row as a compact record, built once per catalog so
+    the planner's loops never construct pandas rows. `row` is the offerings
+    position (seat ledgers and optimizer options index by it).
+    """
+    __slots__ = ("row", "section_id", "course_id", "code", "code_id", "units", "days", "start_time", "end_time",
+                 "day_mask", "start_min", "end_min", "slot_mask", "capacity", "seats_taken", "status",
+                 "waitlist_capacity", "waitlist_count")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+def offering_records(off: pd.DataFrame) -> list[Offering]:
+    # repeated strings (codes, day patterns, times) share one object each
+    text = {col: [sys.intern(str(v)) for v in off[col].tolist()]
+            for col in ["section_id", "course_id", "code", "days", "start_time", "end_time"]}
+    ints = {col: off[col].fillna(0).astype("int64").tolist() if col in off else [0] * len(off)
+            for col in ["units", "day_mask", "start_min", "end_min", "capacity", "seats_taken",
+                        "waitlist_capacity", "waitlist_count"]}
+    status = [sys.intern(str(v)) for v in off["status"].tolist()] if "status" in off else ["Open"] * len(off)
+    return [Offering(*fields) for fields in zip(
+        range(len(off)), text["section_id"], text["course_id"], text["code"], off["code_id"].tolist(),
+        ints["units"], text["days"],
+        text["start_time"], text["end_time"], ints["day_mask"], ints["start_min"], ints["end_min"],
+        off["slot_mask"].tolist(), ints["capacity"], ints["seats_taken"], status, ints["waitlist_capacity"],
+        ints["waitlist_count"])]
+
+
+def file_version(path) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class Catalog:
+    """
+    Courses + sections loaded once, annotated once, with the lookups the
+    planner needs (code → course, course → sections, area → candidates,
+    prerequisites).
+    """
+
+    def __init__(self, courses: pd.DataFrame, sections: pd.DataFrame, version=None):
+        sections = sections.copy()
+        # blanks/TBA come through as NaN; keep them as "" so time parsing is safe
+        for col in ["days", "start_time", "end_time"]:
+            sections[col] = sections[col].fillna("").astype(str)
+        if "status" in sections:
+            sections["status"] = sections["status"].fillna("Open").astype(str)
+
+        self.version = version
+        self.courses = courses
+        self.sections = sections
+        self.annotated = annotate_courses(courses)
+
+        cids = courses["course_id"].tolist()
+        self.units = dict(zip(cids, courses["units"].fillna(0).astype(int)))
+        self.titles = dict(zip(cids, courses["title"]))
+        self.codes = dict(zip(cids, courses["code"].astype(str)))
+        # canonical code → dense int id; the planner's course sets are sets of these
+        self.code_table = CodeTable(self.codes.values())
+        self.code_ids = {cid: self.code_table.intern(c) for cid, c in self.codes.items()}
+        self.by_code_id = {}  # code id → course id (first course with that code)
+        for cid, i in self.code_ids.items():
+            self.by_code_id.setdefault(i, cid)
+        self.course_records = {cid: Course(cid, self.codes[cid], self.titles[cid], self.units[cid]) for cid in cids}
+
+        # every (course, section) pair with the course columns attached, plus
+        # the columnar day/time fields the vectorized filters work on
+        offerings = courses[OFFERING_COLS].merge(sections, on="course_id", how="inner")
+        offerings["units"] = offerings["units"].fillna(0).astype(int)
+        offerings["code_id"] = offerings["course_id"].map(self.code_ids).astype("int64")
+        self.offerings = add_time_columns(offerings)
+        self.section_rows = dict(zip(self.offerings["section_id"], self.offerings.index))
+        # the same rows as records (records[row]), and the credit-bearing rows fillers rank
+        self.records = offering_records(self.offerings)
+        self.credit_offerings = self.offerings[self.offerings["units"].to_numpy() > 0]
+        # rows open for registration now (the planner's candidate filter) and rows with waitlist room;
+        # kept current by apply_changes
+        self.open_rows = open_mask(self.offerings)
+        self.waitlist_rows = waitlist_mask(self.offerings)
+        # course → offerings row positions, in file order
+        codes, uniques = pd.factorize(self.offerings["course_id"])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        self.course_rows = dict(zip(uniques, np.split(order, bounds)))
+
+        # (tier, area) → candidate course ids
+        self.magis_index = area_index(self.annotated, "magis_matches")
+        self.dolan_index = area_index(self.annotated, "dolan_matches")
+        # compiled eligibility rules (prereqs column); .check(completed) per student
+        self.prereqs = PrereqIndex(courses, self.code_ids)
+
+    def course_id(self, code):
+        return self.by_code_id.get(self.code_table.get(code))
+
+    def code_id_set(self, codes) -> set[int]:
+        """Code ids of the catalog courses among `codes` (any spelling)."""
+        return self.code_table.ids_of(codes)
+
+    def sections_for(self, course_ids, open_rows=None) -> pd.DataFrame:
+        """Offerings rows of these courses; with `open_rows` (a row mask), only the open ones."""
+        parts = [self.course_rows[c] for c in course_ids if c in self.course_rows]
+        rows = np.concatenate(parts) if len(parts) > 1 else parts[0] if parts else None
+        if rows is not None and open_rows is not None:
+            rows = rows[open_rows[rows]]
+        if rows is None or not len(rows):
+            return self.offerings.iloc[0:0]
+        return self.offerings.iloc[rows]
+
+    def sections_for_code(self, code, open_rows=None) -> pd.DataFrame:
+        cid = self.course_id(code)
+        return self.sections_for([cid] if cid is not None else [], open_rows)
+
+    def area_candidates(self, tier: str, area: str) -> list:
+        return self.magis_index.get((tier, area), [])
+
+    def apply_changes(self, changes) -> bool:
+        """
+        Patch seat-count and status updates from a parse_courses change log
+        (or seat_feed) in place, open/waitlist masks included. Returns False,
+        leaving the catalog untouched, when the changes need a full reload
+        (inserts, deletes, course edits, moved meeting times).
+        """
+        for c in changes:
+            if (c["table"] != "sections" or c["op"] != "update" or c["key"] not in self.section_rows
+                    or not set(c["fields"]) <= PATCHABLE_FIELDS):
+                return False
+        rows = []
+        for c in changes:
+            row = self.section_rows[c["key"]]
+            rows.append(row)
+            in_sections = self.sections["section_id"] == c["key"]
+            for field, (_, new) in c["fields"].items():
+                value = str(new) if field in TEXT_FIELDS else int(float(new or 0))
+                self.offerings.at[row, field] = value
+                setattr(self.records[row], field, value)
+                if row in self.credit_offerings.index:
+                    self.credit_offerings.at[row, field] = value
+                self.sections.loc[in_sections, field] = value
+        if rows:
+            patched = self.offerings.iloc[rows]
+            self.open_rows[rows] = open_mask(patched)
+            self.waitlist_rows[rows] = waitlist_mask(patched)
+        return True
+
+
+# ---------- process-wide cache ----------
+_CACHE: dict[tuple[str, str], Catalog] = {}
+_LOCK = threading.Lock()
+
+
+def tables_version(courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV) -> tuple:
+    return (file_version(courses_csv), file_version(sections_csv))
+
+
+# ---------- snapshots (whole built Catalog, for fast process start) ----------
+def snapshot_for(sections_csv) -> Path:
+    # the snapshot lives next to the tables it was built from (data/catalog.pkl)
+    return Path(sections_csv).parent / "catalog.pkl"
+
+
+def rules_fingerprint() -> str:
+    blob = json.dumps([MAGIS_RULES, DOLAN_RULES], sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def save_snapshot(catalog: Catalog, path) -> None:
+    """Pickle a built catalog, indexes included; the header lets readers skip stale files cheaply."""
+    # a private temp file per writer, swapped in whole: readers and concurrent writers never see a partial one
+    fd, tmp = tempfile.mkstemp(prefix=".catalog-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"format": SNAPSHOT_FORMAT, "rules": rules_fingerprint(), "version": catalog.version}, f)
+            pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_snapshot(path, version) -> Catalog | None:
+    """The snapshot at `path` if it was taken of tables at `version` under the current rules, else None."""
+    try:
+        with open(path, "rb") as f:
+            head = pickle.load(f)
+            if head != {"format": SNAPSHOT_FORMAT, "rules": rules_fingerprint(), "version": version}:
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def load_catalog(courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV, snapshot=True) -> Catalog:
+    """
+    Return the catalog for these two tables, reading them only when they are
+    new or their mtime/size changed since the last load. A pickled Catalog
+    of the same tables (`snapshot`: a file path, True for catalog.pkl next
+    to the sections CSV, None to always build) is loaded instead of parsing
+    the CSVs, and refreshed whenever the catalog had to be built.
+    """
+    key = (str(courses_csv), str(sections_csv))
+    if snapshot is True:
+        snapshot = snapshot_for(sections_csv)
+    version = tables_version(courses_csv, sections_csv)
+    with _LOCK:
+        cat = _CACHE.get(key)
+        if cat is None or cat.version != version:
+            cat = load_snapshot(snapshot, version) if snapshot else None
+            if cat is None:
+                cat = Catalog(pd.read_csv(courses_csv), pd.read_csv(sections_csv), version=version)
+                if snapshot:
+                    try:
+                        save_snapshot(cat, snapshot)
+                    except OSError:
+                        pass  # read-only data dir: the next start just builds again
+            _CACHE[key] = cat
+        return cat
+
+
+def clear_catalog_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+
+
+def patch_catalog(changes, courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV, previous=None) -> bool:
+    """
+    Bring the cached catalog in line with an incremental rebuild
+    (parse_courses.update_courses_csv) instead of reloading it. `previous` is
+    tables_version() from before the rebuild; if the cached catalog is not
+    that version, or the changes can't be patched, the entry is dropped and
+    the next load_catalog reloads. Returns True when patched.
+    """
+    key = (str(courses_csv), str(sections_csv))
+    with _LOCK:
+        cat = _CACHE.get(key)
+        if cat is None:
+            return False
+        if (previous is None or cat.version == previous) and cat.apply_changes(changes):
+            cat.version = tables_version(courses_csv, sections_csv)
+            return True
+        del _CACHE[key]
+        return False
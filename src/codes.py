@@ -0,0 +1,70 @@
+# codes.py
+"""
+Course codes in one spelling, with dense integer ids.
+
+The registrar tables write "ACCT 1011", the rule tables and transcripts
+"ACCT1011", and uploads anything in between ("acct 1011 ", "ACCT-1011").
+canonical() maps all of them to "ACCT1011". A CodeTable hands each
+canonical code a small int the first time it is seen, so the sets and joins
+the planner does are over ints.
+"""
+import re
+import sys
+from functools import lru_cache
+
+SEPARATORS_RX = re.compile(r"[\s\-_]+")
+
+
+@lru_cache(maxsize=65536)
+def canonical(code) -> str:
+    """'acct 1011' / 'ACCT-1011' / 'ACCT1011' → 'ACCT1011' (interned)."""
+    return sys.intern(SEPARATORS_RX.sub("", str(code)).upper())
+
+
+def canonical_codes(codes) -> list[str]:
+    """Canonical codes in first-seen order, blanks and repeats dropped."""
+    out = {}
+    for c in codes or ():
+        if c is None or (isinstance(c, float) and c != c):
+            continue
+        c = canonical(c)
+        if c:
+            out[c] = None
+    return list(out)
+
+
+class CodeTable:
+    """Canonical code ↔ dense int id (0, 1, 2, ... in first-seen order)."""
+    __slots__ = ("ids", "codes")
+
+    def __init__(self, codes=()):
+        self.ids: dict[str, int] = {}
+        self.codes: list[str] = []
+        for c in codes:
+            self.intern(c)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code) -> bool:
+        return canonical(code) in self.ids
+
+    def intern(self, code) -> int:
+        code = canonical(code)
+        i = self.ids.get(code)
+        if i is None:
+            i = self.ids[code] = len(self.codes)
+            self.codes.append(code)
+        return i
+
+    def get(self, code):
+        """Id of an already-interned code, else None (lookups never grow the table)."""
+        return self.ids.get(canonical(code))
+
+    def ids_of(self, codes) -> set[int]:
+        """Ids of the known codes among `codes`; unknown ones are skipped."""
+        ids = self.ids
+        return {i for i in (ids.get(canonical(c)) for c in codes) if i is not None}
+
+    def code(self, i: int) -> str:
+        return self.codes[i]
@@ -0,0 +1,109 @@
+# cohort.py
+"""
+Seat-aware allocation of sections across a whole cohort.
+
+Every student runs the greedy planner against one shared SeatLedger: full
+sections drop out of the candidate filter and each pick takes a seat, so
+the cohort spreads over sections instead of piling into the same "best" one.
+
+policy="priority"     students are planned to completion in list order
+policy="round_robin"  each round every student makes one pick; the
+                      starting student rotates each round so nobody is
+                      always first in line
+"""
+from collections import deque
+
+import numpy as np
+
+from src.catalog import Catalog, load_catalog
+from src.codes import canonical_codes
+from src.planner import ScheduleState, format_result, greedy_steps, parse_request, requested_courses
+from src.requirements import progress_report
+
+POLICIES = ("round_robin", "priority")
+_DONE = object()
+
+
+class SeatLedger:
+    """Remaining seats per offerings row, plus an `open` mask the planner filters on."""
+
+    def __init__(self, catalog: Catalog):
+        off = catalog.offerings
+        cap = off["capacity"].fillna(0).to_numpy(dtype=np.int64)
+        taken = off["seats_taken"].fillna(0).to_numpy(dtype=np.int64)
+        self.capacity = cap
+        # closed/waitlisted sections start with no seats to hand out
+        self.start = np.where(catalog.open_rows, np.maximum(cap - taken, 0), 0)
+        self.remaining = self.start.copy()
+        self.open = self.remaining > 0
+
+    def take(self, row):
+        self.remaining[row] -= 1
+        if self.remaining[row] <= 0:
+            self.open[row] = False
+
+
+def allocate_cohort(students, catalog: Catalog | None = None, policy="round_robin"):
+    """
+    students: iterable of {"student_id", "completed", "request"} (see batch.read_students).
+    Returns {"students": [per-student results], "sections": per-section fill,
+    "shortfalls": students left under their credit floor}.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy: {policy!r} (expected one of {POLICIES})")
+    catalog = catalog or load_catalog()
+    ledger = SeatLedger(catalog)
+
+    plans = []
+    for s in students:
+        prefs = parse_request(s["request"])
+        completed = canonical_codes(s.get("completed", []))
+        pr = progress_report(completed, catalog.annotated)
+        state = ScheduleState()
+        steps = greedy_steps(catalog, prefs, pr, requested_courses(prefs), state, seats=ledger,
+                             eligibility=catalog.prereqs.check(completed))
+        plans.append((s["student_id"], prefs, pr, state, steps))
+
+    if policy == "priority":
+        for *_, steps in plans:
+            for _ in steps:
+                pass
+    else:
+        active = deque(range(len(plans)))
+        while active:
+            for _ in range(len(active)):
+                i = active.popleft()
+                if next(plans[i][4], _DONE) is not _DONE:
+                    active.append(i)
+            active.rotate(-1)  # next round starts one student later
+
+    results, shortfalls = [], []
+    for sid, prefs, pr, state, _ in plans:
+        res = format_result(state.selected, state.credits, state.reasons, prefs, pr, catalog)
+        results.append({"student_id": sid, **res})
+        if state.credits < prefs["min_credits"]:
+            shortfalls.append({
+                "student_id": sid,
+                "credits": state.credits,
+                "min_credits": prefs["min_credits"],
+                "short_by": prefs["min_credits"] - state.credits,
+            })
+
+    return {"students": results, "sections": section_fill(catalog, ledger), "shortfalls": shortfalls}
+
+
+def section_fill(catalog: Catalog, ledger: SeatLedger) -> list[dict]:
+    """Per-section fill for every section that received at least one student."""
+    assigned = ledger.start - ledger.remaining
+    out = []
+    for row in np.flatnonzero(assigned).tolist():
+        rec = catalog.records[row]
+        out.append({
+            "section_id": rec.section_id,
+            "course_id": rec.course_id,
+            "capacity": int(ledger.capacity[row]),
+            "assigned": int(assigned[row]),
+            "remaining": int(ledger.remaining[row]),
+        })
+    out.sort(key=lambda r: (-r["assigned"], r["section_id"]))
+    return out
@@ -0,0 +1,81 @@
+# metrics.py
+"""
+Optional instrumentation for build_schedule: wall time per stage, counters
+(candidates ranked, overlap checks) and sections rejected per hard rule.
+
+Pass `metrics=Metrics()` to collect; the default NULL_METRICS accepts the
+same calls and does nothing, so uninstrumented runs pay one no-op call per
+stage and per candidate ranking, not per section.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}  # stage → seconds (accumulated if entered more than once)
+        self.counters = Counter()
+        self.rejected = Counter()  # hard rule → sections it ruled out
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def reject(self, rule: str, n: int):
+        if n:
+            self.rejected[rule] += n
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "rejected": dict(self.rejected),
+        }
+
+
+class NullMetrics(Metrics):
+    """Disabled instrumentation: every call is a no-op."""
+    enabled = False
+    _stage = nullcontext()
+
+    def __init__(self):
+        pass
+
+    def stage(self, name: str):
+        return self._stage
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def reject(self, rule: str, n: int):
+        pass
+
+    def as_dict(self) -> dict:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def format_metrics(m: dict) -> list[str]:
+    """Human-readable lines for a metrics dict (bot --profile)."""
+    lines = [f"Total: {m['total_ms']:.1f} ms"]
+    for name, ms in m["stages_ms"].items():
+        lines.append(f"  {name:<28} {ms:9.2f} ms")
+    for name, n in m["counters"].items():
+        lines.append(f"  {name:<28} {n:9d}")
+    for rule, n in m["rejected"].items():
+        lines.append(f"  {'rejected by ' + rule:<28} {n:9d}")
+    return lines
@@ -0,0 +1,141 @@
+# nlparse.py
+"""
+Natural-language schedule preferences → prefs dict.
+
+One compiled pattern tokenizes the request in a single left-to-right pass
+(credit ranges, times with their lead-in, day names, course codes, trigger
+words, clause punctuation); a small state machine then turns the tokens into preferences.
+Results are cached on the normalized text, and every call gets its own copy.
+
+  "12-15 credits" / "15 credits"         min/max credits
+  "avoid Mo Tu", "no Fridays"             avoid_days (every day in the run; a run
+                                          ends at , ; or .)
+  "only Tuesdays"                         preferred_days = just those days
+  any other day mention                   preferred_days
+  "no classes before 10am", "start 9:30",
+  "classes after 10am", "later than 10am"  earliest_start
+  "finish by 5pm", "nothing after 17:00",
+  "no classes after 5pm"                  latest_end
+  "ACCT 1011", "capstone"                 must_include, include_capstone
+"""
+import re
+from functools import lru_cache
+
+from src.codes import canonical
+
+DAY_CODES = {
+    "monday": "Mo", "tuesday": "Tu", "wednesday": "We", "thursday": "Th",
+    "friday": "Fr", "saturday": "Sa", "sunday": "Su",
+    "mon": "Mo", "tue": "Tu", "tues": "Tu", "wed": "We", "thu": "Th", "thur": "Th", "thurs": "Th", "fri": "Fr",
+    "mo": "Mo", "tu": "Tu", "we": "We", "th": "Th", "fr": "Fr", "sa": "Sa", "su": "Su",
+}
+RUN_JOINERS = {"and", "or", "on", "&"}
+# words that may sit between a trigger and its days ("no classes on Fridays")
+RUN_FILLERS = RUN_JOINERS | {"class", "classes"}
+
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?"
+_DAY = "|".join(sorted(DAY_CODES, key=len, reverse=True))
+TOKEN_RX = re.compile(
+    rf"""
+      (?P<range>\d{{1,2}})\s*-\s*(?P<range_hi>\d{{1,2}})\s*credits?\b
+    | (?P<credits>\d{{1,2}})\s*credits?\b
+    | (?:(?:finish|end|done|out)\s+(?:by|before)|(?:nothing|no\s+classes)\s+after)\s*(?P<latest>{_TIME})
+    | (?:start(?:ing)?\s+(?:at\s+|after\s+|later\s+than\s+)?|not\s+before|before|earlier\s+than|after
+       |later\s+than)\s*(?P<earliest>{_TIME})
+    | \b(?P<code>[a-z]{{3,4}}\s*\d{{4}})\b
+    | \b(?P<day>{_DAY})s?\b
+    | \b(?P<trigger>avoid|no|only)\b
+    | (?P<stop>[,;.])
+    | (?P<word>[\w&]+)
+    """,
+    re.VERBOSE,
+)
+TIME_RX = re.compile(_TIME)
+
+
+def normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def to_hhmm(time_text: str) -> str | None:
+    """ "10am" / "9:30 pm" / "18:00" → "HH:MM"; None for a bare hour ("before 10")."""
+    m = TIME_RX.fullmatch(time_text.strip())
+    if not m or (m.group(2) is None and m.group(3) is None):
+        return None
+    h, mm, ap = int(m.group(1)), int(m.group(2) or 0), m.group(3)
+    if ap == "pm" and h != 12:
+        h += 12
+    if ap == "am" and h == 12:
+        h = 0
+    if h > 23 or mm > 59:
+        return None
+    return f"{h:02d}:{mm:02d}"
+
+
+def tokenize(text: str) -> list[tuple[str, str]]:
+    """(kind, value) tokens of already-normalized text, in order."""
+    out = []
+    for m in TOKEN_RX.finditer(text):
+        kind = m.lastgroup
+        if kind == "range_hi":  # lastgroup reports the inner group for ranges
+            kind = "range"
+        if kind == "range":
+            out.append((kind, f"{m.group('range')}-{m.group('range_hi')}"))
+        else:
+            out.append((kind, m.group(kind)))
+    return out
+
+
+@lru_cache(maxsize=1024)
+def _parse(text: str) -> tuple:
+    credit_range = credits = earliest = latest = None
+    avoid, preferred, only, must = [], [], [], []
+    capstone = False
+    run = None  # trigger word the current day run belongs to
+
+    for kind, value in tokenize(text):
+        if kind == "day":
+            code = DAY_CODES[value]
+            (avoid if run in ("avoid", "no") else only if run == "only" else preferred).append(code)
+            continue
+        if kind == "trigger":
+            run = value
+            continue
+        if kind == "word" and value in RUN_FILLERS:
+            continue
+        run = None
+        if kind == "range" and credit_range is None:
+            credit_range = tuple(int(x) for x in value.split("-"))
+        elif kind == "credits" and credits is None:
+            credits = int(value)
+        elif kind == "earliest" and earliest is None:
+            earliest = to_hhmm(value)
+        elif kind == "latest" and latest is None:
+            latest = to_hhmm(value)
+        elif kind == "code":
+            must.append(canonical(value))
+        elif kind == "word" and value == "capstone":
+            capstone = True
+
+    if credit_range:
+        lo, hi = credit_range
+    elif credits is not None:
+        lo = hi = credits
+    else:
+        lo, hi = 12, 15
+    preferred = only or [d for d in preferred if d not in avoid]
+    return lo, hi, frozenset(avoid), frozenset(preferred), earliest, latest, frozenset(must), capstone
+
+
+def parse_request(text: str) -> dict:
+    lo, hi, avoid, preferred, earliest, latest, must, capstone = _parse(normalize(text))
+    return {
+        "min_credits": lo, "max_credits": hi,
+        "avoid_days": set(avoid), "preferred_days": set(preferred),
+        "earliest_start": earliest, "latest_end": latest,
+        "must_include": set(must), "include_capstone": capstone,
+    }
+
+
+def clear_parse_cache() -> None:
+    _parse.cache_clear()
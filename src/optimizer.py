@@ -0,0 +1,194 @@
+# optimizer.py
+"""
+Exact schedule search (branch-and-bound) over requirement "items".
+
+Each item is one thing the schedule could cover (a requested course, a
+Business Core gap, a Magis area, a filler slot) with a list of options
+(course + section). At most one option is picked per item, a course is used
+at most once, sections may not overlap (bitmask AND) and credits stay under
+the max. Landing inside the [min, max] credit window is worth WINDOW_BONUS,
+which dominates everything else.
+"""
+import heapq
+import itertools
+import time
+from collections import namedtuple
+
+WINDOW_BONUS = 1000
+
+# options inside an Item are sorted best value first
+Option = namedtuple("Option", ["value", "units", "mask", "course_id", "row"])
+Item = namedtuple("Item", ["label", "options"])
+SearchResult = namedtuple("SearchResult", ["picks", "value", "credits", "nodes", "complete"])
+RankedResult = namedtuple("RankedResult", ["picks", "value", "credits", "exact"])
+
+
+def in_window(credits, min_credits, max_credits) -> bool:
+    return min_credits <= credits <= max_credits
+
+
+def prune_dominated(items):
+    """
+    Drop options that can never beat another option of the same item: same
+    credits, no more value, and a superset of its time slots. Only applied
+    between courses no other item can use, so the optimum is unchanged.
+    """
+    owners = {}
+    for idx, it in enumerate(items):
+        for o in it.options:
+            owners.setdefault(o.course_id, set()).add(idx)
+
+    out = []
+    for it in items:
+        kept = []
+        for o in it.options:  # best value first, so dominators come earlier
+            if len(owners[o.course_id]) == 1 and any(
+                len(owners[p.course_id]) == 1 and p.units == o.units
+                and p.value >= o.value and not (p.mask & ~o.mask)
+                for p in kept
+            ):
+                continue
+            kept.append(o)
+        out.append(Item(it.label, kept))
+    return out
+
+
+def suffix_bounds(items, max_credits):
+    """
+    suf_units[i]: most credits items i.. could add. ub[i][r]: admissible bound
+    on the value items i.. can add with r credits left (a multiple-choice
+    knapsack over credits that ignores time conflicts and course reuse).
+    """
+    n = len(items)
+    suf_units = [0] * (n + 1)
+    ub = [[0] * (max_credits + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        suf_units[i] = suf_units[i + 1] + max((o.units for o in items[i].options), default=0)
+        best_at = {}  # credits → best option value
+        for o in items[i].options:
+            if o.units <= max_credits and o.value > best_at.get(o.units, -1):
+                best_at[o.units] = o.value
+        nxt, row = ub[i + 1], ub[i]
+        for r in range(max_credits + 1):
+            row[r] = max([nxt[r]] + [v + nxt[r - u] for u, v in best_at.items() if u <= r])
+    return suf_units, ub
+
+
+def branch_and_bound(items, min_credits, max_credits, time_budget=2.0) -> SearchResult:
+    """
+    Best set of (item, option) picks. `complete` is False when the time budget
+    ran out first, in which case the best schedule found so far is returned.
+    """
+    items = prune_dominated(items)
+    n = len(items)
+    suf_units, ub = suffix_bounds(items, max_credits)
+
+    def upper(i, credits):
+        return ub[i][max_credits - credits]
+
+    deadline = time.perf_counter() + time_budget
+    best_value, best_picks = -1, []
+    picks, used = [], set()
+    nodes = 0
+    timed_out = False
+
+    def dfs(i, value, credits, busy):
+        nonlocal best_value, best_picks, nodes, timed_out
+        nodes += 1
+        if nodes & 1023 == 0 and time.perf_counter() > deadline:
+            timed_out = True
+        if timed_out:
+            return
+
+        # skipping everything from here on is always a valid completion
+        here = value + (WINDOW_BONUS if in_window(credits, min_credits, max_credits) else 0)
+        if here > best_value:
+            best_value, best_picks = here, list(picks)
+        if i == n:
+            return
+
+        window = WINDOW_BONUS if credits + suf_units[i] >= min_credits else 0
+        if value + upper(i, credits) + window <= best_value:
+            return
+
+        for o in items[i].options:
+            if o.course_id in used or credits + o.units > max_credits or o.mask & busy:
+                continue
+            if value + o.value + upper(i + 1, credits + o.units) + window <= best_value:
+                continue
+            picks.append((items[i], o))
+            used.add(o.course_id)
+            dfs(i + 1, value + o.value, credits + o.units, busy | o.mask)
+            used.discard(o.course_id)
+            picks.pop()
+
+        dfs(i + 1, value, credits, busy)  # leave item i uncovered
+
+    dfs(0, 0, 0, 0)
+    credits = sum(o.units for _, o in best_picks)
+    return SearchResult(best_picks, max(best_value, 0), credits, nodes, not timed_out)
+
+
+def iter_ranked(items, min_credits, max_credits, time_budget=2.0):
+    """
+    Lazily yield distinct schedules (RankedResult) best first.
+
+    Best-first search over the same tree as branch_and_bound: open nodes sit
+    in one heap keyed by their upper bound, so a finished schedule popped off
+    the heap beats everything still open. The heap persists between yields,
+    so asking for the next schedule continues the search instead of
+    restarting it. Once `time_budget` is spent, open nodes are completed
+    greedily instead of expanded and results are flagged exact=False.
+    """
+    items = prune_dominated(items)
+    n = len(items)
+    suf_units, ub = suffix_bounds(items, max_credits)
+    tie = itertools.count()
+    deadline = time.perf_counter() + time_budget
+
+    def total(value, credits):
+        return value + (WINDOW_BONUS if in_window(credits, min_credits, max_credits) else 0)
+
+    def push(i, value, credits, busy, picks):
+        if i == n:
+            key, done = total(value, credits), 0
+        else:
+            window = WINDOW_BONUS if credits + suf_units[i] >= min_credits else 0
+            key, done = value + ub[i][max_credits - credits] + window, 1
+        # on equal bounds: finished schedules first, then the deepest node
+        heapq.heappush(heap, (-key, done, -i, next(tie), i, value, credits, busy, picks))
+
+    def compatible(opts, credits, busy, used):
+        for o in opts:
+            if o.course_id not in used and credits + o.units <= max_credits and not (o.mask & busy):
+                yield o
+
+    heap = []
+    push(0, 0, 0, 0, ())
+    seen = set()
+    while heap:
+        *_, i, value, credits, busy, picks = heapq.heappop(heap)
+        exact = time.perf_counter() <= deadline
+        used = {o.course_id for _, o in picks}
+
+        if i == n:
+            key = frozenset(o.row for _, o in picks)
+            if key not in seen:
+                seen.add(key)
+                yield RankedResult(list(picks), total(value, credits), credits, exact)
+            continue
+
+        if not exact:
+            # out of time: take the best compatible option of every remaining item
+            for j in range(i, n):
+                o = next(compatible(items[j].options, credits, busy, used), None)
+                if o is not None:
+                    picks += ((items[j], o),)
+                    used.add(o.course_id)
+                    value, credits, busy = value + o.value, credits + o.units, busy | o.mask
+            push(n, value, credits, busy, picks)
+            continue
+
+        for o in compatible(items[i].options, credits, busy, used):
+            push(i + 1, value + o.value, credits + o.units, busy | o.mask, picks + ((items[i], o),))
+        push(i + 1, value, credits, busy, picks)  # leave item i uncovered
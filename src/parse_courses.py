@@ -1,7 +1,23 @@
 import argparse
-import pandas as pd
+import csv
+import json
+import os
 import re
+import sys
+import time
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+if not __package__:  # run as a script (python src/parse_courses.py): make `src` importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.prereqs import course_rule  # stdlib-only, so the parser stays light
+
+COURSE_FIELDS = ["course_id", "code", "title", "units", "bucket", "prereqs", "coreqs", "repeatable"]
+SECTION_FIELDS = ["section_id", "course_id", "instructor", "modality", "campus",
+                  "days", "start_time", "end_time", "capacity", "seats_taken",
+                  "status", "waitlist_capacity", "waitlist_count"]
 
 def parse_section(section: str) -> tuple[str, str]:
     code, sec_id = section.split("-", 1)
@@ -13,8 +29,10 @@ def parse_units(tags: str) -> int:
 
 DAY_MAP = {"M": "Mo", "T": "Tu", "W": "We", "R": "Th", "F": "Fr", "S": "Sa", "U": "Su"}
 
+@lru_cache(maxsize=None)
 def parse_meeting(pattern: str) -> tuple[str, str, str]:
-    if pd.isna(pattern):
+    # the same few hundred patterns repeat across thousands of sections
+    if not pattern:
         return "", "", ""
     try:
         days_part, time_part = [s.strip() for s in pattern.split("|")]
@@ -25,50 +43,163 @@ def parse_meeting(pattern: str) -> tuple[str, str, str]:
     except Exception:
         return "", "", ""
 
-def parse_courses_csv(input_path: str, courses_output: str, sections_output: str) -> None:
-    raw = pd.read_csv(input_path, encoding="latin1")
-    courses = {}
-    sections = []
-    for _, row in raw.iterrows():
-        course_code, section_id = parse_section(row["Section"])
-        units = parse_units(row.get("Course Tags", ""))
-        days, start_time, end_time = parse_meeting(row.get("Meeting Patterns", ""))
-        if course_code not in courses:
-            courses[course_code] = {
-                "course_id": course_code,
-                "code": course_code,
-                "title": row.get("Course Title", ""),
-                "units": units,
-                "bucket": "Elective",
-                "prereqs": [],
-                "coreqs": [],
-                "repeatable": False,
-            }
-        sections.append({
-            "section_id": section_id,
-            "course_id": course_code,
-            "instructor": row.get("Instructor", ""),
-            "modality": "in-person",
-            "campus": row.get("Location", ""),
-            "days": days,
-            "start_time": start_time,
-            "end_time": end_time,
-            "capacity": 100,
-            "seats_taken": int(row.get("Enrolled", 0)),
-        })
-    courses_df = pd.DataFrame(courses.values())
-    sections_df = pd.DataFrame(sections)
-    courses_df.to_csv(courses_output, index=False)
-    sections_df.to_csv(sections_output, index=False)
+def to_int(value, default: int = 0) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+RULE_COLUMN = "Student Eligibility Rule"
+
+def course_row(row: dict, course_code: str, rules=()) -> list[str]:
+    """Course fields from its first section's row; `rules` are every section's eligibility text."""
+    prereqs = course_rule(rules, course_code)
+    return [course_code, course_code, row.get("Course Title") or "",
+            str(parse_units(row.get("Course Tags") or "")), "Elective", json.dumps(prereqs), "[]", "False"]
+
+# the export has no seat cap: closed/waitlisted sections count as full, open ones as this (or one more than enrolled)
+DEFAULT_CAPACITY = 100
+FULL_STATUSES = {"Closed", "Waitlist"}
+
+def section_capacity(status: str, enrolled: int) -> int:
+    if status == "Canceled":
+        return 0
+    if status in FULL_STATUSES:
+        return enrolled
+    return max(DEFAULT_CAPACITY, enrolled + 1)
+
+def section_row(row: dict, course_code: str, section_id: str) -> list[str]:
+    days, start_time, end_time = parse_meeting(row.get("Meeting Patterns") or "")
+    status = (row.get("Section Status") or "Open").strip()
+    enrolled = to_int(row.get("Actual Enrollment Count", row.get("Enrolled")))
+    return [section_id, course_code, row.get("Instructor") or "", "in-person", row.get("Location") or "",
+            days, start_time, end_time, str(section_capacity(status, enrolled)), str(enrolled),
+            status, str(to_int(row.get("Wait List Capacity"))), str(to_int(row.get("Waitlist Count")))]
+
+def iter_raw_rows(input_path: str):
+    """(course_code, section_id, raw row) for every section in the raw export."""
+    with open(input_path, newline="", encoding="latin1") as src:
+        for row in csv.DictReader(src):
+            if row.get("Section"):
+                course_code, section_id = parse_section(row["Section"])
+                yield course_code, section_id, row
+
+def parse_courses_csv(input_path: str, courses_output: str, sections_output: str) -> dict:
+    """
+    Stream the raw registrar export row by row: each section is written as
+    soon as it is parsed; courses are written at the end, once every section's
+    eligibility rule is known (prereqs: see src.prereqs), so memory grows with
+    the number of courses, not rows. Returns {"rows", "courses", "seconds",
+    "rows_per_sec"}.
+    """
+    t0 = time.perf_counter()
+    courses = {}  # course_code → (first row, eligibility rules)
+    rows = 0
+    with open(courses_output, "w", newline="", encoding="utf-8") as c_out, \
+            open(sections_output, "w", newline="", encoding="utf-8") as s_out:
+        course_writer = csv.writer(c_out, lineterminator=os.linesep)
+        section_writer = csv.writer(s_out, lineterminator=os.linesep)
+        course_writer.writerow(COURSE_FIELDS)
+        section_writer.writerow(SECTION_FIELDS)
+        for course_code, section_id, row in iter_raw_rows(input_path):
+            rows += 1
+            first, rules = courses.setdefault(course_code, (row, []))
+            rules.append(row.get(RULE_COLUMN) or "")
+            section_writer.writerow(section_row(row, course_code, section_id))
+        for course_code, (first, rules) in courses.items():
+            course_writer.writerow(course_row(first, course_code, rules))
+    dt = time.perf_counter() - t0
+    return {"rows": rows, "courses": len(courses), "seconds": dt, "rows_per_sec": rows / dt if dt else 0.0}
+
+# ---------- incremental rebuild ----------
+def read_table(path, fields: list[str]) -> dict[str, list[str]]:
+    """Existing structured table keyed by its first column ({} if missing or from another layout)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        if next(reader, None) != fields:
+            return {}
+        return {r[0]: r for r in reader if r}
+
+def diff_rows(table: str, old: dict, new: dict, fields: list[str]) -> list[dict]:
+    changes = []
+    for key, row in new.items():
+        prev = old.get(key)
+        if prev is None:
+            changes.append({"op": "insert", "table": table, "key": key, "row": dict(zip(fields, row))})
+        elif prev != row:
+            changed = {f: [a, b] for f, a, b in zip(fields, prev, row) if a != b}
+            changes.append({"op": "update", "table": table, "key": key, "fields": changed})
+    for key, row in old.items():
+        if key not in new:
+            changes.append({"op": "delete", "table": table, "key": key, "row": dict(zip(fields, row))})
+    return changes
+
+def write_table(path, fields: list[str], rows) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(fields)
+        writer.writerows(rows)
+
+def update_courses_csv(input_path: str, courses_output: str, sections_output: str) -> dict:
+    """
+    Re-export mode: diff a new raw export against the current structured
+    tables by Section key and apply inserts/updates/deletes. The tables end
+    up identical to a full parse_courses_csv, but a table is only rewritten
+    when something in it changed, so its mtime (and any cache keyed on it)
+    survives an unchanged re-export. Returns the parse_courses_csv stats plus
+    "changes": [{"op", "table", "key", "row" | "fields": {name: [old, new]}}].
+    """
+    t0 = time.perf_counter()
+    firsts, rules, sections = {}, {}, {}
+    for course_code, section_id, row in iter_raw_rows(input_path):
+        firsts.setdefault(course_code, row)
+        rules.setdefault(course_code, []).append(row.get(RULE_COLUMN) or "")
+        sections[section_id] = section_row(row, course_code, section_id)
+    courses = {code: course_row(row, code, rules[code]) for code, row in firsts.items()}
+
+    course_changes = diff_rows("courses", read_table(courses_output, COURSE_FIELDS), courses, COURSE_FIELDS)
+    section_changes = diff_rows("sections", read_table(sections_output, SECTION_FIELDS), sections, SECTION_FIELDS)
+    if course_changes or not os.path.exists(courses_output):
+        write_table(courses_output, COURSE_FIELDS, courses.values())
+    if section_changes or not os.path.exists(sections_output):
+        write_table(sections_output, SECTION_FIELDS, sections.values())
+
+    dt = time.perf_counter() - t0
+    rows = len(sections)
+    return {"rows": rows, "courses": len(courses), "seconds": dt, "rows_per_sec": rows / dt if dt else 0.0,
+            "changes": course_changes + section_changes}
+
+def summarize_changes(changes: list[dict]) -> str:
+    counts = {}
+    for c in changes:
+        counts[(c["table"], c["op"])] = counts.get((c["table"], c["op"]), 0) + 1
+    if not counts:
+        return "no changes"
+    return ", ".join(f"{table} {op}: {n}" for (table, op), n in sorted(counts.items()))
 
 def main():
     parser = argparse.ArgumentParser(description="Parse Fairfield course CSV into structured tables.")
     parser.add_argument("--input", required=True, help="Path to raw CSV (e.g. Updated Analytics Request Fall 2025.csv)")
     parser.add_argument("--courses", default="courses_from_csv.csv", help="Output path for courses CSV")
     parser.add_argument("--sections", default="sections_from_csv.csv", help="Output path for sections CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Diff against the existing tables and only apply what changed")
+    parser.add_argument("--log", help="With --incremental: write the change log (JSON lines) here")
     args = parser.parse_args()
-    parse_courses_csv(args.input, args.courses, args.sections)
-    print(f"Wrote {args.courses} and {args.sections}.")
+    if args.incremental:
+        stats = update_courses_csv(args.input, args.courses, args.sections)
+        print(f"Updated {args.courses} and {args.sections}: {summarize_changes(stats['changes'])}.")
+        if args.log:
+            with open(args.log, "w", encoding="utf-8") as f:
+                for change in stats["changes"]:
+                    f.write(json.dumps(change) + "\n")
+    else:
+        stats = parse_courses_csv(args.input, args.courses, args.sections)
+        print(f"Wrote {args.courses} and {args.sections}.")
+    print(f"Parsed {stats['rows']} rows ({stats['courses']} courses) in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/s).")
 
 if __name__ == "__main__":
     main()
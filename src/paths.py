@@ -6,3 +6,4 @@ DATA_DIR = REPO_ROOT / "data"
 COURSES_CSV = DATA_DIR / "courses_from_csv.csv"
 SECTIONS_CSV = DATA_DIR / "sections_from_csv.csv"
 RAW_CSV = DATA_DIR / "Updated Analytics Request Fall 2025.csv"
+CATALOG_SNAPSHOT = DATA_DIR / "catalog.pkl"  # pickled Catalog for fast process start (catalog.load_catalog)
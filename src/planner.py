@@ -1,64 +1,18 @@
 # planner.py
-import re
-import pandas as pd
+import itertools
 
-from src.paths import COURSES_CSV, SECTIONS_CSV
+import numpy as np
+
+from src.catalog import Catalog, load_catalog
+from src.codes import canonical, canonical_codes
 from src.dolan_core_rules import DOLAN_RULES
 from src.magis_core_rules import MAGIS_RULES
-from src.requirements import annotate_courses, progress_report
-
-# ---------- Natural language → preferences ----------
-def parse_request(text: str):
-    t = text.lower()
-    day_map = {
-        "monday": "Mo", "tuesday": "Tu", "wednesday": "We",
-        "thursday": "Th", "friday": "Fr", "saturday": "Sa", "sunday": "Su",
-        "mo": "Mo", "tu": "Tu", "we": "We", "th": "Th", "fr": "Fr", "sa": "Sa", "su": "Su"
-    }
-    prefs = {
-        "min_credits": 12, "max_credits": 15,
-        "avoid_days": set(), "preferred_days": set(),
-        "earliest_start": None, "must_include": set(), "include_capstone": False
-    }
-
-    # credits like "18 credits" or "12-15 credits"
-    m = re.search(r"(\d{1,2})\s*-\s*(\d{1,2})\s*credits?", t)
-    if m:
-        prefs["min_credits"], prefs["max_credits"] = int(m.group(1)), int(m.group(2))
-    else:
-        m = re.search(r"(\d{1,2})\s*credits?", t)
-        if m:
-            prefs["min_credits"] = prefs["max_credits"] = int(m.group(1))
-
-    # avoid/prefer/only days
-    for word, code in day_map.items():
-        if re.search(rf"\bavoid\s+{word}\b", t):
-            prefs["avoid_days"].add(code)
-        if re.search(rf"\bonly\s+{word}s?\b", t):
-            prefs["preferred_days"] = {code}
-        if re.search(rf"\b{word}s?\b", t) and "avoid" not in t[max(0, t.find(word)-8):t.find(word)+8]:
-            prefs["preferred_days"].add(code)
-
-    # earliest start: "no classes before 10am"
-    m = re.search(r"(?:before|earlier than|no.*before)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)", t)
-    if m:
-        h = int(m.group(1))
-        mm = int(m.group(2) or 0)
-        ap = m.group(3)
-        if ap == "pm" and h != 12:
-            h += 12
-        if ap == "am" and h == 12:
-            h = 0
-        prefs["earliest_start"] = f"{h:02d}:{mm:02d}"
-
-    # explicit course codes and Capstone
-    for code in re.findall(r"\b[A-Z]{3,4}\s*\d{4}\b", text.upper()):
-        prefs["must_include"].add(code.replace(" ", ""))
-    if "capstone" in t:
-        prefs["include_capstone"] = True
-
-    return prefs
-
+from src.metrics import NULL_METRICS, Metrics
+from src.nlparse import parse_request
+from src.optimizer import Item, Option, branch_and_bound, iter_ranked
+from src.requirements import progress_report
+from src.schedule_cache import ScheduleCache, schedule_key
+from src.timeslots import DAY_BITS, conflicts
 
 # ---------- helpers ----------
 def t2m(t):
@@ -67,219 +21,429 @@ def t2m(t):
     h, m = str(t).split(":")
     return int(h) * 60 + int(m)
 
-def parse_days(s):
-    if not isinstance(s, str):
-        s = str(s)
-    return {s[i:i+2] for i in range(0, len(s), 2) if len(s[i:i+2]) == 2}
-
-def overlap(a, b):
-    da, db = parse_days(a["days"]), parse_days(b["days"])
-    if da.isdisjoint(db):
-        return False
-    a1, a2 = t2m(a["start_time"]), t2m(a["end_time"])
-    b1, b2 = t2m(b["start_time"]), t2m(b["end_time"])
-    if None in (a1, a2, b1, b2):
-        return False
-    return not (a2 <= b1 or b2 <= a1)
-
-def hard_ok(sec, prefs):
-    if not parse_days(sec["days"]).isdisjoint(prefs["avoid_days"]):
-        return False
+
+# ---------- vectorized rules (columnar section table) ----------
+def days_to_mask(days):
+    return sum(DAY_BITS.get(d, 0) for d in days)
+
+def hard_rule_masks(tbl, prefs):
+    """Pass mask per active hard rule (rule name → boolean array)."""
+    masks = {"avoid_days": (tbl["day_mask"].to_numpy() & days_to_mask(prefs["avoid_days"])) == 0}
     if prefs["earliest_start"]:
-        st = t2m(sec["start_time"])
-        if st is not None and st < t2m(prefs["earliest_start"]):
-            return False
-    return True
-
-def score(sec, prefs):
-    s = 0
-    d = parse_days(sec["days"])
-    if (not prefs["preferred_days"]) or (not d.isdisjoint(prefs["preferred_days"])):
-        s += 2
+        st = tbl["start_min"].to_numpy()
+        masks["earliest_start"] = (st < 0) | (st >= t2m(prefs["earliest_start"]))
+    if prefs.get("latest_end"):
+        en = tbl["end_min"].to_numpy()
+        masks["latest_end"] = (en < 0) | (en <= t2m(prefs["latest_end"]))
+    return masks
+
+def score_vec(tbl, prefs):
+    """Preference score (2 on a preferred day, +1 at/after the earliest start) per row → int array."""
+    dm = tbl["day_mask"].to_numpy()
+    pref = days_to_mask(prefs["preferred_days"])
+    s = np.where((pref == 0) | ((dm & pref) != 0), 2, 0)
     if prefs["earliest_start"]:
-        st = t2m(sec["start_time"])
-        if st is not None and st >= t2m(prefs["earliest_start"]):
-            s += 1
+        st = tbl["start_min"].to_numpy()
+        s = s + ((st >= 0) & (st >= t2m(prefs["earliest_start"])))
     return s
 
-
-# ---------- main planner ----------
-def build_schedule(user_text, completed_codes=None):
-    prefs = parse_request(user_text)
-    completed_codes = [c.replace(" ", "") for c in (completed_codes or [])]
-
-    # load data (portable paths!)
-    courses = pd.read_csv(COURSES_CSV)
-    sections = pd.read_csv(SECTIONS_CSV)
-
-    # annotate + degree progress
-    annotated = annotate_courses(courses)
-    pr = progress_report(completed_codes, annotated)
+def rank_candidates(tbl, prefs, used_ids, open_rows=None, metrics=NULL_METRICS, blocked_ids=None):
+    """
+    Rows passing the hard rules for unused courses, best score first (stable).
+    `used_ids` and `blocked_ids` (courses the student lacks prerequisites
+    for) are catalog code ids, matched against the int code_id column.
+    `open_rows` optionally masks offerings rows by position (e.g. seats left).
+    With `metrics` enabled, sections failing each rule are counted (a section
+    can fail several).
+    """
+    rules = hard_rule_masks(tbl, prefs)
+    code_ids = tbl["code_id"]
+    rules["course_taken"] = ~code_ids.isin(used_ids).to_numpy()
+    if open_rows is not None:
+        rules["full"] = open_rows[tbl.index.to_numpy()]
+    if blocked_ids:
+        rules["prereqs"] = ~code_ids.isin(blocked_ids).to_numpy()
+    keep = np.logical_and.reduce(list(rules.values()))
+    if metrics.enabled:
+        for rule, ok in rules.items():
+            metrics.reject(rule, int(len(ok) - ok.sum()))
+        metrics.count("candidates", int(keep.sum()))
+    tbl = tbl[keep]
+    order = np.argsort(-score_vec(tbl, prefs), kind="stable")
+    return tbl.iloc[order]
+
+
+# ---------- greedy planner ----------
+class ScheduleState:
+    """One student's schedule as the greedy planner builds it."""
+
+    def __init__(self):
+        self.selected = []
+        self.used_ids = set()  # catalog code ids
+        self.credits = 0
+        self.busy = 0  # OR of the slot masks of everything selected
+        self.reasons = []
+
+def seats_note(catalog, code, seats=None) -> str:
+    """' (all sections full ...)' when `code` is offered but none of its sections is open, else ''."""
+    rows = catalog.course_rows.get(catalog.course_id(code))
+    open_rows = seats.open if seats is not None else catalog.open_rows
+    if rows is None or open_rows[rows].any():
+        return ""
+    waits = int(catalog.waitlist_rows[rows].sum())
+    if not waits:
+        return " (all sections full)"
+    return f" (all sections full; waitlist open on {waits} section{'s' if waits > 1 else ''})"
+
+def prereq_note(eligibility, course_id) -> str:
+    why = eligibility.why(course_id)
+    return f"prerequisites not met (needs {why})" if why else "prerequisites not met"
+
+def greedy_steps(catalog, prefs, pr, musts, state, seats=None, metrics=NULL_METRICS, eligibility=None):
+    """
+    The greedy planner as a generator that yields after every pick attempt,
+    so callers can interleave many students (see cohort.py). Sections that
+    are closed or full (catalog.open_rows) are skipped; with `seats`
+    (exposing an `open` row mask and `take(row)`), its mask is used instead
+    and every pick takes a seat. With `eligibility` (catalog.prereqs.check),
+    courses the student lacks prerequisites for are pruned before any of
+    their sections are ranked. `metrics` records time per phase.
+    """
+    records = catalog.records
+    reasons = state.reasons
     missing_bc = pr["business_core_missing"]
     unmet = pr["magis_unmet"]
+    blocked = eligibility.blocked if eligibility is not None else frozenset()
+    blocked_ids = eligibility.blocked_ids if eligibility is not None else frozenset()
+
+    def best_fit(course_ids):
+        # highest-scoring open section that passes the hard rules and fits the schedule;
+        # closed rows are dropped before the frame is built
+        open_rows = seats.open if seats is not None else catalog.open_rows
+        opts = catalog.sections_for(course_ids, open_rows)
+        if opts.empty:
+            return None
+        checks = 0
+        for row in rank_candidates(opts, prefs, state.used_ids, open_rows, metrics, blocked_ids).index.tolist():
+            checks += 1
+            s = records[row]
+            if not conflicts(s.slot_mask, state.busy):
+                metrics.count("overlap_checks", checks)
+                return s
+        metrics.count("overlap_checks", checks)
+        return None
 
-    units = {r["course_id"]: int(r.get("units", 0)) for _, r in courses.iterrows()}
-    titles = {r["course_id"]: r.get("title", "") for _, r in courses.iterrows()}
-    codes = {r["course_id"]: str(r.get("code", "")) for _, r in courses.iterrows()}
+    def fits(s):
+        return state.credits + s.units <= prefs["max_credits"]
 
-    selected, used_courses, credits, reasons = [], set(), 0, []
+    def take(s):
+        state.selected.append(s)
+        state.used_ids.add(s.code_id)
+        state.credits += s.units
+        state.busy |= s.slot_mask
+        if seats is not None:
+            seats.take(s.row)
 
     # 1) must-include (NL) + optional Capstone
-    musts = set(prefs["must_include"])
-    if prefs["include_capstone"]:
-        musts.add("MGMT4300")
-
-    for want in musts:
-        opts = courses[courses["code"] == want][["course_id", "code", "title", "units"]].merge(
-            sections, on="course_id", how="inner"
-        )
-        opts = [
-            s for _, s in opts.iterrows()
-            if s["course_id"] not in used_courses
-            and hard_ok(s, prefs)
-            and not any(overlap(s, x) for x in selected)
-        ]
-        if not opts:
-            reasons.append(f"No section fits for requested {want}.")
-            continue
-
-        opts.sort(key=lambda s: score(s, prefs), reverse=True)
-        best = opts[0]
-        u = units.get(best["course_id"], 0)
-
-        if credits + u <= prefs["max_credits"]:
-            selected.append(best)
-            used_courses.add(best["course_id"])
-            credits += u
-            reasons.append(f"Included requested {want}.")
+    with metrics.stage("must_include"):
+        for want in sorted(musts):
+            cid = catalog.course_id(want)
+            if cid in blocked:
+                reasons.append(f"Skipped requested {want}: {prereq_note(eligibility, cid)}.")
+                yield
+                continue
+            best = best_fit([cid])
+            if best is None:
+                reasons.append(f"No section fits for requested {want}{seats_note(catalog, want, seats)}.")
+            elif fits(best):
+                take(best)
+                reasons.append(f"Included requested {want}.")
+            yield
 
     # 2) Business Core gaps
-    for code in missing_bc:
-        if credits >= prefs["max_credits"]:
-            break
-
-        opts = courses[courses["code"] == code][["course_id", "code", "title", "units"]].merge(
-            sections, on="course_id", how="inner"
-        )
-        opts = [
-            s for _, s in opts.iterrows()
-            if s["course_id"] not in used_courses
-            and hard_ok(s, prefs)
-            and not any(overlap(s, x) for x in selected)
-        ]
-        if not opts:
-            reasons.append(f"No available section for Business Core {code}.")
-            continue
+    with metrics.stage("business_core"):
+        for code in missing_bc:
+            if state.credits >= prefs["max_credits"]:
+                break
 
-        opts.sort(key=lambda s: score(s, prefs), reverse=True)
-        best = opts[0]
-        u = units.get(best["course_id"], 0)
-
-        if credits + u <= prefs["max_credits"]:
-            selected.append(best)
-            used_courses.add(best["course_id"])
-            credits += u
-            reasons.append(f"Added Business Core: {code}.")
-
-            for co in DOLAN_RULES["business_core"].get("co_reqs", {}).get(code, []):
-                co_opts = courses[courses["code"] == co][["course_id", "code", "title", "units"]].merge(
-                    sections, on="course_id", how="inner"
-                )
-                co_opts = [
-                    s for _, s in co_opts.iterrows()
-                    if s["course_id"] not in used_courses
-                    and hard_ok(s, prefs)
-                    and not any(overlap(s, x) for x in selected)
-                ]
-                if co_opts:
-                    co_opts.sort(key=lambda s: score(s, prefs), reverse=True)
-                    cbest = co_opts[0]
-                    uu = units.get(cbest["course_id"], 0)
-
-                    if credits + uu <= prefs["max_credits"]:
-                        selected.append(cbest)
-                        used_courses.add(cbest["course_id"])
-                        credits += uu
+            cid = catalog.course_id(code)
+            if cid in blocked:
+                reasons.append(f"Business Core {code} not yet: {prereq_note(eligibility, cid)}.")
+                yield
+                continue
+            best = best_fit([cid])
+            if best is None:
+                reasons.append(f"No available section for Business Core {code}{seats_note(catalog, code, seats)}.")
+            elif fits(best):
+                take(best)
+                reasons.append(f"Added Business Core: {code}.")
+
+                for co in DOLAN_RULES["business_core"].get("co_reqs", {}).get(code, []):
+                    cbest = best_fit([catalog.course_id(co)])
+                    if cbest is not None and fits(cbest):
+                        take(cbest)
                         reasons.append(f"Added co-requisite: {co}.")
+            yield
 
     # 3) Magis unmet (Orientation then Exploration) — one course per unmet area
-    def pick_magis(tier):
-        nonlocal selected, used_courses, credits
-        for area in unmet[tier]:
-            if credits >= prefs["max_credits"]:
+    with metrics.stage("magis"):
+        for tier in ["orientation", "exploration"]:
+            if state.credits >= prefs["min_credits"]:
                 break
-
-            cand_ids = [
-                r["course_id"] for _, r in annotated.iterrows()
-                if any(t == tier and a == area for (t, a) in r.get("magis_matches", []))
-            ]
-            if not cand_ids:
-                reasons.append(f"No course found for Magis {tier}: {area}.")
-                continue
-
-            merged = courses[courses["course_id"].isin(cand_ids)][["course_id", "code", "title", "units"]].merge(
-                sections, on="course_id", how="inner"
-            )
-            opts = [
-                s for _, s in merged.iterrows()
-                if s["course_id"] not in used_courses
-                and hard_ok(s, prefs)
-                and not any(overlap(s, x) for x in selected)
-            ]
-            if not opts:
-                reasons.append(f"All sections conflict for Magis {tier}: {area}.")
-                continue
-
-            opts.sort(key=lambda s: score(s, prefs), reverse=True)
-            best = opts[0]
-            u = units.get(best["course_id"], 0)
-
-            if credits + u <= prefs["max_credits"]:
-                selected.append(best)
-                used_courses.add(best["course_id"])
-                credits += u
-                reasons.append(f"Added Magis {tier} – {area}: {best['code']}.")
-
-    if credits < prefs["min_credits"]:
-        pick_magis("orientation")
-    if credits < prefs["min_credits"]:
-        pick_magis("exploration")
+            for area in unmet[tier]:
+                if state.credits >= prefs["max_credits"]:
+                    break
+
+                cand_ids = catalog.area_candidates(tier, area)
+                eligible = [c for c in cand_ids if c not in blocked]
+                best = best_fit(eligible) if eligible else None
+                if not cand_ids:
+                    reasons.append(f"No course found for Magis {tier}: {area}.")
+                elif not eligible:
+                    reasons.append(f"No Magis {tier}: {area} course without unmet prerequisites.")
+                elif best is None:
+                    reasons.append(f"All sections conflict for Magis {tier}: {area}.")
+                elif fits(best):
+                    take(best)
+                    reasons.append(f"Added Magis {tier} – {area}: {best.code}.")
+                yield
 
     # 4) Fill up to credit floor with best non-conflicting fits
-    if credits < prefs["min_credits"]:
-        merged = courses[["course_id", "code", "title", "units"]].merge(sections, on="course_id", how="inner")
-        cand = [
-            s for _, s in merged.iterrows()
-            if s["course_id"] not in used_courses
-            and units.get(s["course_id"], 0) > 0
-            and hard_ok(s, prefs)
-            and not any(overlap(s, x) for x in selected)
-        ]
-        cand.sort(key=lambda s: score(s, prefs), reverse=True)
-        for s in cand:
-            u = units.get(s["course_id"], 0)
-            if credits + u > prefs["max_credits"]:
-                continue
-            selected.append(s)
-            used_courses.add(s["course_id"])
-            credits += u
-            reasons.append(f"Added good-fit filler: {s['code']}.")
-            if credits >= prefs["min_credits"]:
-                break
+    if state.credits < prefs["min_credits"]:
+        with metrics.stage("filler"):
+            open_rows = seats.open if seats is not None else catalog.open_rows
+            cand = rank_candidates(catalog.credit_offerings, prefs, state.used_ids, open_rows, metrics,
+                                   blocked_ids)
+            checks = 0
+            for row in cand.index.tolist():
+                s = records[row]
+                if not fits(s):
+                    continue
+                # re-check against fillers picked earlier in this loop (and, when
+                # students are interleaved, seats taken since the ranking was made)
+                if s.code_id in state.used_ids:
+                    continue
+                checks += 1
+                if conflicts(s.slot_mask, state.busy):
+                    continue
+                if seats is not None and not seats.open[s.row]:
+                    continue
+                take(s)
+                reasons.append(f"Added good-fit filler: {s.code}.")
+                yield
+                if state.credits >= prefs["min_credits"]:
+                    break
+            metrics.count("overlap_checks", checks)
+
+
+# ---------- optimal mode (branch-and-bound) ----------
+# objective weights: landing in the credit window (optimizer.WINDOW_BONUS)
+# beats requested courses, which beat Business Core, then Magis, then fit
+MUST_WEIGHT, CORE_WEIGHT, MAGIS_WEIGHT = 100, 10, 8
+FILLER_LIMIT = 30  # best-scoring extra courses offered to the search as fillers
+
+def section_options(tbl, prefs, exclude, weight=0, metrics=NULL_METRICS, open_rows=None):
+    """Search options for one item: hard-rule-passing sections, one per distinct meeting time (`exclude`: code ids)."""
+    ranked = rank_candidates(tbl, prefs, exclude, open_rows, metrics=metrics)
+    opts, seen = [], set()
+    for row, cid, u, mask, sc in zip(ranked.index, ranked["course_id"], ranked["units"],
+                                      ranked["slot_mask"], score_vec(ranked, prefs)):
+        if (cid, mask) in seen:
+            continue
+        seen.add((cid, mask))
+        opts.append(Option(weight + int(sc), int(u), mask, cid, row))
+    return opts
+
+def requirement_items(catalog, prefs, pr, musts, completed_codes, metrics=NULL_METRICS, eligibility=None):
+    # completed courses and those still missing prerequisites get no options
+    done = catalog.code_id_set(completed_codes)
+    if eligibility is not None:
+        done |= eligibility.blocked_ids
+    open_rows = catalog.open_rows  # closed and full sections get no options
+    items = []
+    for want in sorted(musts):
+        items.append(Item(("must", want), section_options(catalog.sections_for_code(want, open_rows), prefs, done,
+                                                          MUST_WEIGHT, metrics)))
+    for code in pr["business_core_missing"]:
+        items.append(Item(("core", code), section_options(catalog.sections_for_code(code, open_rows), prefs, done,
+                                                          CORE_WEIGHT, metrics)))
+    # areas and fillers only count credit-bearing sections (no 0-credit labs/internships)
+    for tier in ["orientation", "exploration"]:
+        for area in pr["magis_unmet"][tier]:
+            tbl = catalog.sections_for(catalog.area_candidates(tier, area), open_rows)
+            tbl = tbl[tbl["units"].to_numpy() > 0]
+            items.append(Item(("magis", tier, area), section_options(tbl, prefs, done, MAGIS_WEIGHT, metrics)))
+
+    # fillers: the best remaining credit-bearing courses, one item each
+    taken = done | {catalog.code_ids[o.course_id] for it in items for o in it.options}
+    fill = section_options(catalog.credit_offerings, prefs, taken, metrics=metrics, open_rows=open_rows)
+    fill_ids = list(dict.fromkeys(o.course_id for o in fill))[:FILLER_LIMIT]
+    for cid in fill_ids:
+        items.append(Item(("filler", cid), [o for o in fill if o.course_id == cid]))
+    return items
+
+def describe_picks(items, picks, catalog, eligibility=None):
+    """Turn search picks back into selected offerings rows, credits and reasons."""
+    selected, reasons = [], []
+    chosen = {item.label: opt for item, opt in picks}
+    for item in items:
+        kind = item.label[0]
+        opt = chosen.get(item.label)
+        if opt is not None:
+            selected.append(catalog.records[opt.row])
+        cid = catalog.course_id(item.label[1]) if kind in ("must", "core") else None
+        if opt is None and eligibility is not None and cid in eligibility:
+            if kind == "must":
+                reasons.append(f"Skipped requested {item.label[1]}: {prereq_note(eligibility, cid)}.")
+            else:
+                reasons.append(f"Business Core {item.label[1]} not yet: {prereq_note(eligibility, cid)}.")
+        elif kind == "must":
+            if opt is not None:
+                reasons.append(f"Included requested {item.label[1]}.")
+            elif not item.options:
+                reasons.append(f"No section fits for requested {item.label[1]}{seats_note(catalog, item.label[1])}.")
+            else:
+                reasons.append(f"Requested {item.label[1]} did not fit alongside higher-value picks.")
+        elif kind == "core":
+            if opt is not None:
+                reasons.append(f"Added Business Core: {item.label[1]}.")
+            elif not item.options:
+                reasons.append(f"No available section for Business Core {item.label[1]}"
+                               f"{seats_note(catalog, item.label[1])}.")
+        elif kind == "magis" and opt is not None:
+            reasons.append(f"Added Magis {item.label[1]} – {item.label[2]}: {catalog.codes[opt.course_id]}.")
+        elif kind == "filler" and opt is not None:
+            reasons.append(f"Added good-fit filler: {catalog.codes[opt.course_id]}.")
+    return selected, sum(o.units for _, o in picks), reasons
+
+def optimal_schedule(catalog, prefs, pr, musts, completed_codes, time_budget, metrics=NULL_METRICS,
+                     eligibility=None):
+    with metrics.stage("requirements"):
+        items = requirement_items(catalog, prefs, pr, musts, completed_codes, metrics, eligibility)
+    with metrics.stage("search"):
+        res = branch_and_bound(items, prefs["min_credits"], prefs["max_credits"], time_budget)
+    metrics.count("search_nodes", res.nodes)
+
+    selected, credits, reasons = describe_picks(items, res.picks, catalog, eligibility)
+    if not res.complete:
+        reasons.append(f"Search stopped at the {time_budget}s time budget; showing the best schedule found.")
+
+    search = {"nodes": res.nodes, "complete": res.complete, "value": res.value}
+    return selected, credits, reasons, search
+
+def iter_schedules(prefs, completed_codes=None, k=5, catalog: Catalog | None = None, time_budget=2.0):
+    """
+    Lazily yield up to `k` distinct conflict-free schedules for parsed `prefs`
+    (see parse_request), best first, each shaped like build_schedule's result
+    plus "rank" and "search". One search is shared across all k results.
+    """
+    completed_codes = canonical_codes(completed_codes)
+    catalog = catalog or load_catalog()
+    pr = progress_report(completed_codes, catalog.annotated)
+    eligibility = catalog.prereqs.check(completed_codes)
+
+    items = requirement_items(catalog, prefs, pr, requested_courses(prefs), completed_codes,
+                              eligibility=eligibility)
+    ranked = iter_ranked(items, prefs["min_credits"], prefs["max_credits"], time_budget)
+    for rank, res in enumerate(itertools.islice(ranked, k), 1):
+        selected, credits, reasons = describe_picks(items, res.picks, catalog, eligibility)
+        result = format_result(selected, credits, reasons, prefs, pr, catalog)
+        result["rank"] = rank
+        result["search"] = {"value": res.value, "exact": res.exact}
+        yield result
 
-    # Output
+
+# ---------- main planner ----------
+def requested_courses(prefs):
+    # must-include (NL) + optional Capstone
+    musts = set(prefs["must_include"])
+    if prefs["include_capstone"]:
+        musts.add("MGMT4300")
+    return musts
+
+def unplaced_courses(catalog, result):
+    """
+    Requested and Business Core courses a result's schedule lacks: a section
+    of theirs opening up can change the result (ScheduleCache.put courses).
+    """
+    rows = catalog.section_rows
+    placed = {canonical(catalog.records[rows[sid]].code) for sid in result["sections"] if sid in rows}
+    wanted = requested_courses(result["prefs"]) | set(result["progress"]["business_core_missing"])
+    return wanted - placed
+
+def format_result(selected, credits, reasons, prefs, pr, catalog):
+    courses = catalog.course_records
     pretty = [
-        f"{codes[s['course_id']]} - {titles[s['course_id']]} | {s['section_id']} | {s['days']} {s['start_time']}-{s['end_time']}"
+        f"{courses[s.course_id].code} - {courses[s.course_id].title} | {s.section_id} | {s.days} {s.start_time}-{s.end_time}"
         for s in selected
     ]
     return {
         "schedule": pretty,
         "credits": credits,
         "reasons": reasons,
+        "sections": [s.section_id for s in selected],
         "prefs": prefs,
         "progress": pr,
     }
 
+def build_schedule(user_text, completed_codes=None, catalog: Catalog | None = None,
+                   mode="greedy", time_budget=2.0, metrics: Metrics | None = None,
+                   cache: ScheduleCache | None = None):
+    """
+    mode="greedy" (default) fills requirements in priority order and never
+    backtracks; mode="optimal" runs a branch-and-bound search bounded by
+    `time_budget` seconds. With `metrics` (a metrics.Metrics), per-stage
+    timings and counters are returned under result["metrics"]. With `cache`
+    (a schedule_cache.ScheduleCache), results are reused for the same parsed
+    request and transcript; profiled runs always plan.
+    """
+    if mode not in ("greedy", "optimal"):
+        raise ValueError(f"Unknown mode: {mode!r} (expected 'greedy' or 'optimal')")
+    m = metrics or NULL_METRICS
+    with m.stage("parse"):
+        prefs = parse_request(user_text)
+    completed_codes = canonical_codes(completed_codes)
+
+    # shared, already-annotated catalog (loaded once per process)
+    with m.stage("catalog"):
+        catalog = catalog or load_catalog()
+
+    key = None
+    if cache is not None and metrics is None:
+        key = schedule_key(prefs, completed_codes, catalog, mode, time_budget)
+        if key is not None:
+            cache.check_version(catalog.version)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+
+    # degree progress, and which courses the transcript can't take yet
+    with m.stage("progress"):
+        pr = progress_report(completed_codes, catalog.annotated)
+    with m.stage("prereqs"):
+        eligibility = catalog.prereqs.check(completed_codes)
+    m.count("prereq_blocked", len(eligibility.blocked))
+
+    musts = requested_courses(prefs)
+
+    if mode == "optimal":
+        selected, credits, reasons, search = optimal_schedule(catalog, prefs, pr, musts, completed_codes,
+                                                              time_budget, m, eligibility)
+        with m.stage("format"):
+            result = format_result(selected, credits, reasons, prefs, pr, catalog)
+        result["search"] = search
+    else:
+        state = ScheduleState()
+        for _ in greedy_steps(catalog, prefs, pr, musts, state, metrics=m, eligibility=eligibility):
+            pass
+        with m.stage("format"):
+            result = format_result(state.selected, state.credits, state.reasons, prefs, pr, catalog)
+    if metrics is not None:
+        result["metrics"] = metrics.as_dict()
+    if key is not None:
+        cache.put(key, result, courses=unplaced_courses(catalog, result))
+    return result
+
 
 if __name__ == "__main__":
     import sys
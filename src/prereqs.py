@@ -0,0 +1,326 @@
+# prereqs.py
+"""
+Prerequisites from the registrar's "Student Eligibility Rule" column.
+
+parse_rule() turns rule text into an expression tree (JSON-friendly lists):
+
+    ["course", "ACCT1011"]                   completed this course
+    ["range", "MATH", 1016, 9999, 1]         n courses in subject, numbered lo..hi
+    ["note", "Sophomore Standing"]           condition a transcript can't show
+    ["and", ...] / ["or", ...]
+    []                                       no rule
+
+parse_courses stores one tree per course (any section's rule admits the
+student, so section rules are OR-ed) in the courses table's `prereqs`
+column. PrereqIndex compiles those trees once per catalog: notes count as
+met (majors, standing, placement, approvals can't be checked here, so they
+never block), the rest becomes DNF clauses over bits, one bit per referenced
+course or range. Checking a transcript is then one encode plus an AND per
+clause, memoized per completed-set bitset.
+"""
+import json
+import re
+from functools import lru_cache
+
+from src.codes import canonical
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4}
+CODE_RX = re.compile(r"\b([A-Z]{3,4})\s?(\d{4}[A-Z]?)\b")
+BARE_RX = re.compile(r"(?<![\d.])\b(\d{4}[A-Z]?)\b")
+PREFIX_RX = re.compile(r"^(?:CM_|PRE_|PR_|AR_|UG_|GR_|UG\b|GR\b|_|\s)+")
+NOTE_RX = re.compile(
+    r"approv|permission|placement|waive|standing|major|minor|program|student|gpa|credit|honors|without|"
+    r"\bnot\b|block|matriculat|\bonly\b|\bedit\b|study|level|course",
+    re.I,
+)
+COUNT_RX = re.compile(r"\b((?i:one|two|three|four))\s+(?i:courses?\s+in)\s+([A-Z]{3,4})\b")
+LEVEL_RX = re.compile(r"\b(?:((?i:one|two|three|four))\s+)?([A-Z]{3,4})\s+(\d)000\s*(?i:level)\b")
+RANGE_RX = re.compile(r"\b([A-Z]{3,4})\s?(\d{4})\s*-\s*(\d{4})\b")
+MAX_CLAUSES = 64  # larger DNFs are left unchecked rather than expanded
+# class standing by earned credits, matching the export's own "has completed N semester credits" rules
+STANDING_CREDITS = {"sophomore": 24, "junior": 54, "senior": 84}
+STANDING_RX = re.compile(r"(?i)\b(sophomore|junior|senior)\s+standing|\b(\d{2,3})\s+(?:semester\s+)?credits\b")
+
+
+# ---------- parsing ----------
+def _flat(op, parts):
+    parts = [p for p in parts if p]
+    if len(parts) == 1:
+        return parts[0]
+    return [op] + parts if parts else []
+
+
+def _split(text, rx):
+    return [p.strip(" ,;") for p in re.split(rx, text) if p.strip(" ,;")]
+
+
+def _atom(text: str, ctx: dict):
+    text = text.strip(" ,;-")
+    if not text:
+        return []
+    m = COUNT_RX.search(text) or LEVEL_RX.search(text)
+    if m is not None:
+        n = NUMBER_WORDS.get((m.group(1) or "one").lower(), 1)
+        subject = m.group(2).upper()
+        if m.re is LEVEL_RX:
+            lo = int(m.group(3)) * 1000
+            return ["range", subject, lo, lo + 999, n]
+        return ["range", subject, 0, 9999, n]
+    m = RANGE_RX.search(text)
+    if m is not None:
+        return ["range", m.group(1), int(m.group(2)), int(m.group(3)), 1]
+    if NOTE_RX.search(text):
+        return ["note", text]
+    m = re.match(r"([A-Z]{3,4})\s?(\d{4})\+$", text)
+    if m is not None:
+        ctx["subject"] = m.group(1)
+        return ["range", m.group(1), int(m.group(2)), 9999, 1]
+    codes = []
+    for m in CODE_RX.finditer(text):
+        ctx["subject"] = m.group(1)
+        codes.append(m.group(1) + m.group(2))
+    if not codes and ctx.get("subject"):
+        codes = [ctx["subject"] + b for b in BARE_RX.findall(text)]
+    codes = [c for c in codes if c != ctx["self"]]
+    if not codes:
+        return ["note", text]
+    return _flat("and", [["course", c] for c in dict.fromkeys(codes)])
+
+
+def _parse(text: str, ctx: dict):
+    """;  >  AND  >  OR  >  ', or' lists  >  and/,/&  >  or  >  atom (loosest first)."""
+    for rx, op in [(r";", "and"), (r"\bAND\b", "and"), (r"\bOR\b", "or")]:
+        parts = _split(text, rx)
+        if len(parts) > 1:
+            return _flat(op, [_parse(p, ctx) for p in parts])
+    text = text.strip(" ,;()")
+    if re.search(r",\s*or\b", text):
+        if not re.search(r"(?i)\band\b|&", text):
+            # "ECON 1011, ECON 1012, or FNCE 2101": the whole list is alternatives
+            return _flat("or", [_parse(p, ctx) for p in _split(text, r",\s*(?:or\b)?")])
+        return _flat("or", [_parse(p, ctx) for p in _split(text, r",\s*or\b")])
+    parts = _split(text, r"(?i),\s*(?:and\b)?|&|\band\b")
+    if len(parts) > 1:
+        return _flat("and", [_parse(p, ctx) for p in parts])
+    parts = _split(text, r"(?i)\bor\b")
+    if len(parts) > 1:
+        return _flat("or", [_parse(p, ctx) for p in parts])
+    return _atom(text, ctx)
+
+
+@lru_cache(maxsize=None)
+def _parse_cached(text: str, self_code: str):
+    return json.dumps(parse_rule_uncached(text, self_code))
+
+
+def parse_rule_uncached(text: str, self_code: str = ""):
+    text = " ".join(str(text or "").split())
+    if not text:
+        return []
+    text = PREFIX_RX.sub("", text)
+    if re.search(r"(?i)\bcourses\s+from\b", text):
+        return ["note", text]  # "Four Courses from MKTG 6510, ..." — a k-of-n list we don't model
+    # normalize the shapes the splitter can't see through
+    text = re.sub(r"\b([A-Z]{3,4}\s?\d{4})\s+or\s+higher\b", r"\1+", text, flags=re.I)
+    text = re.sub(r"(\d{4}[A-Z]?)\s*\((\d{4}[A-Z]?)\)", r"\1 or \2", text)
+    text = re.sub(r"(?i)\b(one|two|three|four)(\s+courses?\s+in\s+)([A-Z]{3,4})\s+or\s+([A-Z]{3,4})\b",
+                  r"\1\2\3 or \1\2\4", text)
+    text = re.sub(r"(?<=[A-Z0-9])\s*/\s*(?=[A-Z])", " or ", text)
+    return _parse(text, {"self": canonical(self_code), "subject": None})
+
+
+def parse_rule(text: str, self_code: str = ""):
+    """Expression tree for one rule's text; references to `self_code` itself are dropped."""
+    return json.loads(_parse_cached(str(text or ""), self_code or ""))
+
+
+def course_rule(texts, self_code: str = ""):
+    """One tree for a course from its sections' rules: any section admitting the student is enough."""
+    trees = []
+    for text in dict.fromkeys(texts):
+        tree = parse_rule(text, self_code)
+        if not tree:
+            return []  # an open section: no rule for the course
+        trees.append(tree)
+    return _flat("or", trees)
+
+
+def describe(tree) -> str:
+    """Readable form of a tree (for reasons/explanations)."""
+    if not tree:
+        return "none"
+    kind = tree[0]
+    if kind == "course":
+        m = re.match(r"([A-Z]+)(\d.*)", tree[1])
+        return f"{m.group(1)} {m.group(2)}" if m else tree[1]
+    if kind == "range":
+        _, subject, lo, hi, n = tree
+        span = f"{lo}+" if hi >= 9999 and lo else (f"{lo}-{hi}" if lo else "")
+        return f"{n} {subject} course{'s' if n > 1 else ''}{' ' + span if span else ''}"
+    if kind == "note":
+        return tree[1]
+    inner = [describe(t) for t in tree[1:]]
+    joined = f" {kind} ".join(f"({s})" if " and " in s or " or " in s else s for s in inner)
+    return joined
+
+
+def standing_credits(tree) -> int:
+    """Earned credits a tree's standing/credit notes ask for (0 if none must hold)."""
+    if not tree or tree[0] in ("course", "range"):
+        return 0
+    if tree[0] == "note":
+        m = STANDING_RX.search(tree[1])
+        if m is None:
+            return 0
+        return STANDING_CREDITS[m.group(1).lower()] if m.group(1) else int(m.group(2))
+    parts = [standing_credits(t) for t in tree[1:]]
+    return max(parts) if tree[0] == "and" else min(parts)
+
+
+# ---------- compiled index ----------
+def fold(tree):
+    """Drop notes (treated as met): True, or a tree with only course/range leaves."""
+    if not tree or tree[0] == "note":
+        return True
+    if tree[0] in ("course", "range"):
+        return tree
+    parts = [fold(t) for t in tree[1:]]
+    if tree[0] == "and":
+        parts = [p for p in parts if p is not True]
+        return _flat("and", parts) if parts else True
+    if any(p is True for p in parts):
+        return True
+    return _flat("or", parts)
+
+
+def dnf(tree, leaf_bit) -> list[int] | None:
+    """Clauses (bitsets of leaves that must all hold) for a folded tree, or None if too large."""
+    if tree[0] in ("course", "range"):
+        return [leaf_bit(tree)]
+    subs = [dnf(t, leaf_bit) for t in tree[1:]]
+    if any(s is None for s in subs):
+        return None
+    if tree[0] == "or":
+        out = sorted({c for s in subs for c in s})
+    else:
+        out = [0]
+        for s in subs:
+            out = sorted({a | b for a in out for b in s})
+            if len(out) > MAX_CLAUSES:
+                return None
+    # a clause that contains another is redundant
+    return [c for c in out if not any(o != c and o & c == o for o in out)]
+
+
+class Eligibility:
+    """One transcript checked against a PrereqIndex: `blocked` course_ids (and their code ids) plus why()."""
+
+    def __init__(self, index, mask: int, blocked: frozenset, blocked_ids: frozenset = frozenset()):
+        self.index = index
+        self.mask = mask
+        self.blocked = blocked
+        self.blocked_ids = blocked_ids
+
+    def __contains__(self, course_id) -> bool:
+        return course_id in self.blocked
+
+    def why(self, course_id) -> str:
+        """The unmet part of the closest clause, e.g. 'ACCT 1011 and ECON 1012'."""
+        clauses = self.index.clauses.get(course_id)
+        if not clauses:
+            return ""
+        best = min(clauses, key=lambda c: bin(c & ~self.mask).count("1"))
+        return " and ".join(self.index.leaf_text[b] for b in self.index.bits_of(best & ~self.mask))
+
+
+class PrereqIndex:
+    """Compiled prerequisites of a courses table (Catalog.prereqs); check() evaluates a transcript."""
+
+    def __init__(self, courses, code_ids=None):
+        self.leaf_bits: dict[tuple, int] = {}  # leaf → bit position
+        self.leaves: dict[int, tuple] = {}
+        self.leaf_text: dict[int, str] = {}
+        self.course_bits: dict[str, int] = {}  # canonical code → bit mask
+        self.ranges: dict[str, list[tuple[int, int, int, int]]] = {}  # subject → (lo, hi, n, bit)
+        self.clauses: dict[str, list[int]] = {}  # course_id → DNF clauses
+        self.unchecked: set[str] = set()  # rules too large to compile (never blocked)
+        # the prerequisite graph over exact course references (ranges aren't edges)
+        self.requires: dict[str, set[str]] = {}  # course_id → canonical codes it may need
+        self.unlocks: dict[str, set[str]] = {}  # canonical code → course_ids that mention it
+        self.standing: dict[str, int] = {}  # course_id → earned credits its notes ask for (roadmap only)
+        self.code_ids: dict[str, int] = code_ids or {}  # course_id → Catalog code id
+        self._blocked: dict[int, tuple] = {}  # completed bitset → (blocked course_ids, their code ids)
+
+        if "prereqs" not in courses:
+            return
+        for cid, raw in zip(courses["course_id"], courses["prereqs"]):
+            tree = raw if isinstance(raw, list) else json.loads(raw) if isinstance(raw, str) and raw else []
+            if standing_credits(tree):
+                self.standing[cid] = standing_credits(tree)
+            folded = fold(tree)
+            if folded is True:
+                continue
+            clauses = dnf(folded, self.leaf_bit)
+            if clauses is None:
+                self.unchecked.add(cid)
+                continue
+            self.clauses[cid] = clauses
+            codes = {self.leaves[b][1] for c in clauses for b in self.bits_of(c) if self.leaves[b][0] == "course"}
+            self.requires[cid] = codes
+            for code in codes:
+                self.unlocks.setdefault(code, set()).add(cid)
+
+    def leaf_bit(self, leaf) -> int:
+        key = tuple(leaf)
+        bit = self.leaf_bits.get(key)
+        if bit is None:
+            bit = self.leaf_bits[key] = len(self.leaf_bits)
+            self.leaves[bit] = key
+            self.leaf_text[bit] = describe(leaf)
+            if leaf[0] == "course":
+                self.course_bits[leaf[1]] = self.course_bits.get(leaf[1], 0) | (1 << bit)
+            else:
+                _, subject, lo, hi, n = leaf
+                self.ranges.setdefault(subject, []).append((lo, hi, n, bit))
+        return 1 << bit
+
+    @staticmethod
+    def bits_of(mask: int):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def encode(self, completed_codes) -> int:
+        mask = 0
+        counts = {}
+        for code in {canonical(c) for c in completed_codes}:
+            mask |= self.course_bits.get(code, 0)
+            m = re.match(r"([A-Z]{3,4})(\d{4})", code)
+            if m is not None and m.group(1) in self.ranges:
+                for lo, hi, n, bit in self.ranges[m.group(1)]:
+                    if lo <= int(m.group(2)) <= hi:
+                        counts[bit] = counts.get(bit, 0) + 1
+                        if counts[bit] >= n:
+                            mask |= 1 << bit
+        return mask
+
+    def blocked(self, mask: int) -> frozenset:
+        return self._blocked_pair(mask)[0]
+
+    def _blocked_pair(self, mask: int) -> tuple:
+        hit = self._blocked.get(mask)
+        if hit is None:
+            if len(self._blocked) >= 4096:
+                self._blocked.clear()
+            cids = frozenset(cid for cid, clauses in self.clauses.items() if not any(c & mask == c for c in clauses))
+            ids = frozenset(self.code_ids[c] for c in cids if c in self.code_ids)
+            hit = self._blocked[mask] = (cids, ids)
+        return hit
+
+    def check(self, completed_codes) -> Eligibility:
+        """Which catalog courses this transcript can't register for yet."""
+        if not self.clauses:
+            return Eligibility(self, 0, frozenset())
+        mask = self.encode(completed_codes)
+        return Eligibility(self, mask, *self._blocked_pair(mask))
@@ -1,86 +1,184 @@
 # requirements.py
 import re
+import weakref
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
+from src.codes import CodeTable, canonical
 from src.magis_core_rules import MAGIS_RULES
 from src.dolan_core_rules import DOLAN_RULES
 
 PREFIX_RX = re.compile(r"^[A-Z]{3,4}")
+DIGITS_RX = re.compile(r"\d+")
 
 def course_prefix(code: str) -> str:
-    code = str(code).replace(" ", "")
-    m = PREFIX_RX.match(code)
+    m = PREFIX_RX.match(canonical(code))
     return m.group(0) if m else ""
 
 def course_level(code: str) -> int:
-    digits = re.findall(r"\d+", str(code))
-    if not digits:
+    m = DIGITS_RX.search(str(code))
+    if not m:
         return 0
-    n = int(digits[0])
+    n = int(m.group(0))
     return (n // 1000) * 1000  # 1000, 2000, ...
 
+def level_ok(level_req, lvl: int) -> bool:
+    if not level_req:
+        return True
+    if level_req == "1000":
+        return lvl == 1000
+    if level_req == "2000+":
+        return lvl >= 2000
+    return False
+
+# ---------- compiled rules ----------
+Area = namedtuple("Area", ["tier", "name", "courses", "prefixes", "level"])
+
+def compile_area(tier: str, name: str, spec: dict) -> Area:
+    return Area(tier, name, frozenset(canonical(c) for c in spec.get("by_course", [])),
+                frozenset(spec.get("by_prefix", [])),
+                spec.get("level"))
+
+class RuleIndex:
+    """
+    Magis areas compiled once: exact course → areas and prefix → areas, so
+    matching a course is two dict lookups instead of a scan over every area.
+    """
+
+    def __init__(self, rules: dict = MAGIS_RULES):
+        self.areas = [compile_area(tier, name, spec)
+                      for tier in ("orientation", "exploration") for name, spec in rules[tier].items()]
+        self.by_course: dict[str, list[int]] = {}
+        self.by_prefix: dict[str, list[int]] = {}
+        for i, area in enumerate(self.areas):
+            for c in area.courses:
+                self.by_course.setdefault(c, []).append(i)
+            for px in area.prefixes:
+                self.by_prefix.setdefault(px, []).append(i)
+
+    def matches(self, code: str) -> list[tuple[str, str]]:
+        """(tier, area) hits for one course, in rule order."""
+        code = canonical(code)
+        hits = set(self.by_course.get(code, ()))
+        px = course_prefix(code)
+        if px in self.by_prefix:
+            lvl = course_level(code)
+            hits.update(i for i in self.by_prefix[px] if level_ok(self.areas[i].level, lvl))
+        return [(self.areas[i].tier, self.areas[i].name) for i in sorted(hits)]
+
+MAGIS_INDEX = RuleIndex()
+BUSINESS_CORE = frozenset(canonical(c) for c in DOLAN_RULES["business_core"]["required_courses"])
+
 def matches_area(code: str, area_def: dict) -> bool:
-    code = code.replace(" ", "")
-    # exact course match
-    if code in set(area_def.get("by_course", [])):
+    area = compile_area("", "", area_def)
+    code = canonical(code)
+    if code in area.courses:
         return True
-    # prefix + optional level rule
     px = course_prefix(code)
-    if px and px in set(area_def.get("by_prefix", [])):
-        lv_req = area_def.get("level")
-        if not lv_req:
-            return True
-        lvl = course_level(code)
-        if lv_req == "1000" and lvl == 1000:
-            return True
-        if lv_req == "2000+" and lvl >= 2000:
-            return True
-    return False
+    return bool(px) and px in area.prefixes and level_ok(area.level, course_level(code))
 
 def annotate_courses(courses_df: pd.DataFrame) -> pd.DataFrame:
     magis_hits, dolan_hits = [], []
-    for _, row in courses_df.iterrows():
-        code = str(row["code"]).replace(" ", "")
-        m_hits, d_hits = [], []
-
-        # Magis Orientation / Exploration
-        for area, spec in MAGIS_RULES["orientation"].items():
-            if matches_area(code, spec): m_hits.append(("orientation", area))
-        for area, spec in MAGIS_RULES["exploration"].items():
-            if matches_area(code, spec): m_hits.append(("exploration", area))
-
+    for code in courses_df["code"].astype(str):
+        code = canonical(code)
+        magis_hits.append(MAGIS_INDEX.matches(code))
         # Dolan Business Core — exact courses
-        if code in set(DOLAN_RULES["business_core"]["required_courses"]):
-            d_hits.append(("business_core", code))
-
-        magis_hits.append(m_hits); dolan_hits.append(d_hits)
+        dolan_hits.append([("business_core", code)] if code in BUSINESS_CORE else [])
 
     out = courses_df.copy()
     out["magis_matches"] = magis_hits
     out["dolan_matches"] = dolan_hits
     return out
 
+def area_index(annotated: pd.DataFrame, column: str = "magis_matches") -> dict[tuple[str, str], list]:
+    """Inverted index: (tier, area) → course ids, in catalog order."""
+    index: dict[tuple[str, str], list] = {}
+    for cid, hits in zip(annotated["course_id"], annotated[column]):
+        for key in hits:
+            index.setdefault(key, []).append(cid)
+    return index
+
+# ---------- progress ----------
+def row_mask(rows: list[int], n: int) -> int:
+    """Int with bits `rows` set, built in one pass (no per-row big-int ORs)."""
+    bits = np.zeros(n, dtype=bool)
+    bits[rows] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+class ProgressIndex:
+    """
+    Completed-course sets as bitsets over the code ids of one annotated
+    table (a CodeTable of its codes, then the Business Core codes). Each
+    Magis area is a precomputed id mask, so "how many completed courses
+    count toward this area" is a popcount, and reports are memoized on the
+    bits that can matter (area codes + Business Core courses). Transcripts
+    that differ only in courses no rule looks at share one cache entry.
+    """
+
+    def __init__(self, annotated_courses_df: pd.DataFrame, cache_size: int = 4096):
+        self.code_table = CodeTable(annotated_courses_df["code"].astype(str))
+        n = len(self.code_table)
+        # id positions, not per-id ints: n ints of up to n bits would be O(n²) memory
+        area_ids = {tier: {area: [] for area in MAGIS_RULES[tier]} for tier in ("orientation", "exploration")}
+        hits = annotated_courses_df["magis_matches"].tolist() if "magis_matches" in annotated_courses_df else []
+        for code, row_hits in zip(annotated_courses_df["code"].astype(str), hits):
+            for tier, area in row_hits:
+                if tier in area_ids and area in area_ids[tier]:
+                    area_ids[tier][area].append(self.code_table.get(code))
+        self.area_masks = {tier: {area: row_mask(ids, n) for area, ids in areas.items()}
+                           for tier, areas in area_ids.items()}
+        self.relevant = 0
+        for masks in self.area_masks.values():
+            for m in masks.values():
+                self.relevant |= m
+        self.core = sorted(BUSINESS_CORE)
+        # core code id → core bit
+        self.core_bits = {self.code_table.intern(c): 1 << i for i, c in enumerate(self.core)}
+        self.needs = {tier: {k: v["need"] for k, v in MAGIS_RULES[tier].items()} for tier in self.area_masks}
+        self.cached_report = lru_cache(maxsize=cache_size)(self.compute)
+
+    def encode(self, completed_codes) -> tuple[int, int]:
+        """(id bitset restricted to rule-relevant codes, Business Core bitset)."""
+        rows = core = 0
+        for i in self.code_table.ids_of(completed_codes):
+            rows |= 1 << i
+            core |= self.core_bits.get(i, 0)
+        return rows & self.relevant, core
+
+    def compute(self, rows: int, core: int) -> tuple:
+        missing = tuple(c for i, c in enumerate(self.core) if not core >> i & 1)
+        unmet = tuple(
+            tuple(a for a, need in self.needs[tier].items() if (rows & self.area_masks[tier][a]).bit_count() < need)
+            for tier in ("orientation", "exploration")
+        )
+        return missing, unmet
+
+    def report(self, completed_codes) -> dict:
+        missing, (orientation, exploration) = self.cached_report(*self.encode(completed_codes))
+        # fresh lists every call, so callers can't corrupt the cached entry
+        return {
+            "business_core_missing": list(missing),
+            "magis_unmet": {"orientation": list(orientation), "exploration": list(exploration)},
+        }
+
+_PROGRESS_INDEXES: dict[int, tuple] = {}
+
+def progress_index(annotated_courses_df: pd.DataFrame) -> ProgressIndex:
+    """ProgressIndex for this exact table, built on first use and reused while the table lives."""
+    key = id(annotated_courses_df)
+    entry = _PROGRESS_INDEXES.get(key)
+    if entry is None or entry[0]() is not annotated_courses_df:
+        # drop entries whose tables are gone (ids can be reused)
+        for k in [k for k, (ref, _) in _PROGRESS_INDEXES.items() if ref() is None]:
+            del _PROGRESS_INDEXES[k]
+        entry = (weakref.ref(annotated_courses_df), ProgressIndex(annotated_courses_df))
+        _PROGRESS_INDEXES[key] = entry
+    return entry[1]
+
+def clear_progress_cache() -> None:
+    _PROGRESS_INDEXES.clear()
+
 def progress_report(completed_codes: list[str], annotated_courses_df: pd.DataFrame) -> dict:
-    completed_codes = set(c.replace(" ", "") for c in completed_codes)
-    comp = annotated_courses_df[annotated_courses_df["code"].str.replace(" ","").isin(completed_codes)]
-
-    # Business Core
-    req = set(DOLAN_RULES["business_core"]["required_courses"])
-    missing_business = sorted(list(req - completed_codes))
-
-    # Magis Orientation / Exploration
-    def unmet_for(tier: str):
-        needs = {k: v["need"] for k, v in MAGIS_RULES[tier].items()}
-        have = {k: 0 for k in needs}
-        for _, r in comp.iterrows():
-            for t, area in r.get("magis_matches", []):
-                if t == tier and area in have:
-                    have[area] += 1
-        return [a for a, need in needs.items() if have.get(a, 0) < need]
-
-    unmet_orientation = unmet_for("orientation")
-    unmet_exploration = unmet_for("exploration")
-
-    return {
-        "business_core_missing": missing_business,
-        "magis_unmet": {"orientation": unmet_orientation, "exploration": unmet_exploration}
-    }
+    return progress_index(annotated_courses_df).report(completed_codes)
@@ -0,0 +1,358 @@
+# roadmap.py
+"""
+Term-by-term roadmap to close the Business Core and the Magis areas.
+
+plan_roadmap() searches over semesters: each step picks one term's courses
+(within the credit window, eligible under the catalog's prerequisites and
+the standing the student will have by then), best-first on terms used plus
+a lower bound on the terms still needed. States are memoized on
+(prerequisite bitset of everything completed, requirement coverage vector,
+standing), so two orders of courses that leave the student equally placed
+are expanded once. It stops at `time_budget` seconds and returns the best
+plan found: the first complete one, or the one closest to complete.
+
+The export covers a single term, so every catalog course is assumed to be
+offered each term; sections and meeting times are left to build_schedule.
+Terms below the credit floor are topped up with free electives.
+"""
+import heapq
+import itertools
+import math
+import time
+
+from src.catalog import Catalog, load_catalog
+from src.codes import canonical, canonical_codes
+from src.dolan_core_rules import DOLAN_RULES
+from src.magis_core_rules import MAGIS_RULES
+from src.prereqs import STANDING_CREDITS
+from src.requirements import BUSINESS_CORE, progress_report
+
+ELECTIVE = "ELECTIVE"
+ELECTIVE_UNITS = 3
+AREA_CHOICES = 4  # candidate courses kept per Magis area (best first)
+CORE_WEIGHT, AREA_WEIGHT, UNLOCK_WEIGHT = 3, 2, 2
+
+
+class Requirements:
+    """The requirements as (label, need, member course_ids), plus the static course → requirement map."""
+
+    def __init__(self, catalog: Catalog):
+        self.labels, self.needs, self.members = [], [], []
+        for code in sorted(BUSINESS_CORE):
+            cid = catalog.course_id(code)
+            self.add(f"Business Core {code}", 1, {cid} if cid is not None else set())
+        for tier in ("orientation", "exploration"):
+            for area, spec in MAGIS_RULES[tier].items():
+                self.add(f"Magis {tier} – {area}", spec["need"], set(catalog.area_candidates(tier, area)))
+        self.covers: dict[str, list[int]] = {}
+        for i, members in enumerate(self.members):
+            for cid in members:
+                self.covers.setdefault(cid, []).append(i)
+
+    def add(self, label, need, members):
+        self.labels.append(label)
+        self.needs.append(need)
+        self.members.append(frozenset(members))
+
+    def remaining(self, done) -> tuple:
+        return tuple(max(0, need - len(members & done)) for need, members in zip(self.needs, self.members))
+
+
+class Node:
+    __slots__ = ("terms", "done", "codes", "remaining", "earned")
+
+    def __init__(self, terms, done, codes, remaining, earned):
+        self.terms = terms  # tuple of terms, each a tuple of (course_id or ELECTIVE, why)
+        self.done = done  # completed course_ids (catalog courses only)
+        self.codes = codes  # completed codes, for prerequisite checks
+        self.remaining = remaining
+        self.earned = earned
+
+
+class RoadmapSearch:
+    def __init__(self, catalog: Catalog, completed_codes, min_credits, max_credits, max_terms, beam,
+                 earned_credits=None):
+        self.catalog = catalog
+        self.index = catalog.prereqs
+        self.min_credits, self.max_credits = min_credits, max_credits
+        self.max_terms = max_terms
+        self.beam = beam
+        self.req = Requirements(catalog)
+
+        codes = frozenset(canonical(c) for c in completed_codes)
+        done = frozenset(cid for cid in map(catalog.course_id, codes) if cid is not None)
+        if earned_credits is None:
+            # transcript codes outside this term's catalog count as a typical 3-credit course
+            earned_credits = sum(catalog.units.get(catalog.course_id(c), ELECTIVE_UNITS) for c in codes)
+        remaining = self.req.remaining(done)
+        # requirements this catalog can't close (too few courses offered) are reported, not searched for
+        self.unplannable = [i for i, r in enumerate(remaining) if len(self.req.members[i] - done) < r]
+        remaining = tuple(0 if i in self.unplannable else r for i, r in enumerate(remaining))
+        self.start = Node((), done, codes, remaining, earned_credits)
+
+        co_reqs = DOLAN_RULES["business_core"].get("co_reqs", {})
+        self.co_reqs = {catalog.course_id(k): [catalog.course_id(c) for c in v] for k, v in co_reqs.items()}
+        self.co_req_of = {c: k for k, v in self.co_reqs.items() for c in v}
+        self.build_pool()
+
+    # ---------- static course pool ----------
+    def build_pool(self):
+        """Courses that close a requirement, plus (transitively) those that unlock them."""
+        catalog, index = self.catalog, self.index
+        self.helps: dict[str, set[str]] = {}  # course_id → pool courses whose prerequisites it advances
+        pool = {cid for members in self.req.members for cid in members}
+        frontier = set(pool)
+        for _ in range(3):  # prerequisite chains deeper than this don't occur in the export
+            new = set()
+            for target in frontier:
+                for clause in index.clauses.get(target, ()):
+                    for bit in index.bits_of(clause):
+                        for cid in self.leaf_courses(index.leaves[bit]):
+                            self.helps.setdefault(cid, set()).add(target)
+                            if cid not in pool:
+                                new.add(cid)
+            pool |= new
+            frontier = new
+        self.pool = pool
+        self.order = {cid: i for i, cid in enumerate(sorted(pool))}
+
+    def leaf_courses(self, leaf) -> list:
+        if leaf[0] == "course":
+            cid = self.catalog.course_id(leaf[1])
+            return [cid] if cid is not None else []
+        # a range ("1 PHIL course"): the lowest-numbered courses in it without prerequisites of their own
+        _, subject, lo, hi, n = leaf
+        hits = []
+        for cid, code in sorted(self.catalog.codes.items(), key=lambda kv: kv[1]):
+            c = canonical(code)
+            if c[:len(subject)] == subject and c[len(subject):len(subject) + 4].isdigit() \
+                    and lo <= int(c[len(subject):len(subject) + 4]) <= hi and cid not in self.index.clauses:
+                hits.append(cid)
+                if len(hits) >= n + 2:
+                    break
+        return hits
+
+    # ---------- per-state ----------
+    def standing(self, earned) -> int:
+        return sum(earned >= v for v in STANDING_CREDITS.values())
+
+    def key(self, node: Node):
+        return self.index.encode(node.codes), node.remaining, self.standing(node.earned)
+
+    def eligible(self, node: Node, cid) -> bool:
+        return cid not in self.blocked and self.index.standing.get(cid, 0) <= node.earned
+
+    def needed(self, node: Node) -> set:
+        """Pool courses still worth taking: they close an open requirement, or unlock one that does."""
+        needed = {cid for cid in self.pool - node.done
+                  if any(node.remaining[r] for r in self.req.covers.get(cid, ()))}
+        for _ in range(3):
+            more = {cid for cid, targets in self.helps.items()
+                    if cid not in node.done and cid not in needed and targets & needed & self.blocked}
+            if not more:
+                break
+            needed |= more
+        return needed
+
+    def candidates(self, node: Node, needed) -> list:
+        """Eligible needed courses, trimmed to the best few per Magis area."""
+        eligible = [cid for cid in needed if self.eligible(node, cid)
+                    and (cid not in self.co_req_of or self.co_req_of[cid] in node.done)]
+        unlock = {cid: len(self.helps.get(cid, set()) & needed & self.blocked) for cid in eligible}
+        keep = set()
+        for i, members in enumerate(self.req.members):
+            if not node.remaining[i]:
+                continue
+            ranked = sorted((c for c in eligible if c in members),
+                            key=lambda c: (-unlock[c], -len(self.req.covers[c]), self.order[c]))
+            keep.update(ranked[:1 if len(members) == 1 else AREA_CHOICES])
+        keep.update(c for c in eligible if unlock[c])
+        return sorted(keep, key=self.order.get)
+
+    def gain(self, cid, remaining, needed) -> int:
+        g = 0
+        for r in self.req.covers.get(cid, ()):
+            if remaining[r]:
+                g += CORE_WEIGHT if len(self.req.members[r]) == 1 else AREA_WEIGHT
+        return g + UNLOCK_WEIGHT * len(self.unlocked(cid, remaining, needed))
+
+    def unlocked(self, cid, remaining, needed) -> set:
+        """Blocked courses `cid` helps unlock that are still wanted after this term's picks so far."""
+        return {t for t in self.helps.get(cid, set()) & needed & self.blocked
+                if t not in self.req.covers or any(remaining[r] for r in self.req.covers[t])}
+
+    def pack(self, node: Node, cands, needed, exclude=(), fill_to=None) -> list:
+        """
+        One term: highest marginal gain first while credits allow, co-requisites
+        alongside, then electives up to `fill_to` (default: the credit floor).
+        """
+        remaining = list(node.remaining)
+        picks, credits = [], 0
+        taken = set()
+        units = self.catalog.units
+        while True:
+            best, best_key = None, None
+            for cid in cands:
+                if cid in taken or cid in exclude:
+                    continue
+                extra = [cid] + [c for c in self.co_reqs.get(cid, []) if c not in node.done]
+                if credits + sum(units.get(c, 0) for c in extra) > self.max_credits:
+                    continue
+                g = self.gain(cid, remaining, needed)
+                if g > 0 and (best is None or g > best_key):
+                    best, best_key = extra, g
+            if best is None:
+                break
+            for cid in best:
+                if cid in taken:
+                    continue
+                why = [self.req.labels[r] for r in self.req.covers.get(cid, ()) if remaining[r]]
+                unlocks = sorted(self.catalog.codes[t] for t in self.unlocked(cid, remaining, needed))
+                if unlocks and not why:
+                    why = [f"prerequisite for {', '.join(unlocks[:3])}"]
+                for r in self.req.covers.get(cid, ()):
+                    if remaining[r]:
+                        remaining[r] -= 1
+                taken.add(cid)
+                credits += units.get(cid, 0)
+                picks.append((cid, tuple(why)))
+        while picks and credits + ELECTIVE_UNITS <= self.max_credits and credits < (fill_to or self.min_credits):
+            picks.append((ELECTIVE, ()))
+            credits += ELECTIVE_UNITS
+        return picks
+
+    def child(self, node: Node, picks) -> Node:
+        taken = [cid for cid, _ in picks if cid != ELECTIVE]
+        done = node.done | set(taken)
+        codes = node.codes | {canonical(self.catalog.codes[c]) for c in taken}
+        earned = node.earned + sum(ELECTIVE_UNITS if c == ELECTIVE else self.catalog.units.get(c, 0)
+                                   for c, _ in picks)
+        remaining = tuple(0 if i in self.unplannable else r for i, r in enumerate(self.req.remaining(done)))
+        return Node(node.terms + (tuple(picks),), frozenset(done), frozenset(codes), remaining, earned)
+
+    def expand(self, node: Node) -> list[Node]:
+        self.blocked = self.index.check(node.codes).blocked
+        needed = self.needed(node)
+        cands = self.candidates(node, needed)
+        # while a course waits on class standing, extra credits now bring it closer
+        fill_to = self.max_credits if self.waiting_on_standing(node, needed) else self.min_credits
+        variants, seen = [], set()
+        first = self.pack(node, cands, needed, fill_to=fill_to)
+        # alternatives: postpone one of the first term's picks
+        for exclude in [()] + [(cid,) for cid, _ in first[:self.beam - 1] if cid != ELECTIVE]:
+            picks = first if not exclude else self.pack(node, cands, needed, exclude, fill_to)
+            ids = frozenset(c for c, _ in picks)
+            if ids and ids not in seen:
+                seen.add(ids)
+                variants.append(picks)
+        if not variants and fill_to == self.max_credits:
+            # nothing to take yet but standing will open more: a term of electives
+            variants.append([(ELECTIVE, ())] * max(1, self.max_credits // ELECTIVE_UNITS))
+        return [self.child(node, picks) for picks in variants]
+
+    def waiting_on_standing(self, node: Node, needed) -> bool:
+        return any(cid not in self.blocked and self.index.standing.get(cid, 0) > node.earned for cid in needed)
+
+    def lower_bound(self, node: Node) -> int:
+        """Terms still needed at least: core credits over the credit cap, standing still to earn."""
+        if not any(node.remaining):
+            return 0
+        core_units = sum(self.catalog.units.get(next(iter(self.req.members[i])), 0)
+                         for i, r in enumerate(node.remaining) if r and len(self.req.members[i]) == 1)
+        terms = max(1, math.ceil(core_units / self.max_credits))
+        for i, r in enumerate(node.remaining):
+            if r and len(self.req.members[i]) == 1:
+                need = self.index.standing.get(next(iter(self.req.members[i])), 0) - node.earned
+                if need > 0:
+                    terms = max(terms, math.ceil(need / self.max_credits) + 1)
+        return terms
+
+    # ---------- search ----------
+    def run(self, time_budget: float) -> tuple[Node, dict]:
+        deadline = time.perf_counter() + time_budget
+        tie = itertools.count()
+        start = self.start
+        heap = [(self.lower_bound(start), sum(start.remaining), next(tie), start)]
+        best_g = {self.key(start): 0}
+        best, closest = None, start
+        expanded = 0
+        while heap:
+            if time.perf_counter() > deadline:
+                break
+            f, left, _, node = heapq.heappop(heap)
+            if not left:
+                best = node
+                break
+            if (left, len(node.terms)) < (sum(closest.remaining), len(closest.terms)):
+                closest = node
+            if len(node.terms) >= self.max_terms:
+                continue
+            expanded += 1
+            for child in self.expand(node):
+                key = self.key(child)
+                g = len(child.terms)
+                if best_g.get(key, g + 1) <= g:
+                    continue
+                best_g[key] = g
+                heapq.heappush(heap, (g + self.lower_bound(child), sum(child.remaining), next(tie), child))
+        stats = {"expanded": expanded, "states": len(best_g),
+                 "complete": best is not None or not heap}
+        return best or closest, stats
+
+
+def plan_roadmap(completed_codes=None, catalog: Catalog | None = None, min_credits=12, max_credits=18,
+                 max_terms=8, time_budget=2.0, earned_credits=None, beam=4) -> dict:
+    """
+    A roadmap from `completed_codes`: {"terms": [{"term", "credits", "courses": [{"code", "title",
+    "units", "counts_toward"}]}], "complete", "unmet", "unplannable", "search"}. `earned_credits`
+    defaults to the transcript's catalog credits (used for standing rules).
+    """
+    if min_credits > max_credits:
+        raise ValueError(f"min_credits {min_credits} exceeds max_credits {max_credits}")
+    completed_codes = canonical_codes(completed_codes)
+    catalog = catalog or load_catalog()
+    t0 = time.perf_counter()
+    search = RoadmapSearch(catalog, completed_codes, min_credits, max_credits, max_terms, beam, earned_credits)
+    node, stats = search.run(time_budget)
+    stats["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+    terms = []
+    for n, picks in enumerate(node.terms, 1):
+        courses = []
+        for cid, why in picks:
+            if cid == ELECTIVE:
+                courses.append({"code": ELECTIVE, "title": "Free elective", "units": ELECTIVE_UNITS,
+                                "counts_toward": []})
+            else:
+                title = catalog.titles.get(cid)
+                courses.append({"code": catalog.codes[cid], "title": title if isinstance(title, str) else "",
+                                "units": int(catalog.units.get(cid, 0)), "counts_toward": list(why)})
+        terms.append({"term": n, "credits": sum(c["units"] for c in courses), "courses": courses})
+    planned = [canonical(c["code"]) for t in terms for c in t["courses"] if c["code"] != ELECTIVE]
+    return {
+        "terms": terms,
+        "complete": not any(node.remaining),
+        "unmet": progress_report(completed_codes + planned, catalog.annotated),
+        "unplannable": [search.req.labels[i] for i in search.unplannable],
+        "search": stats,
+    }
+
+
+def format_roadmap(result: dict) -> list[str]:
+    """Human-readable lines for a plan_roadmap result (bot --roadmap)."""
+    lines = []
+    for term in result["terms"]:
+        lines.append(f"Term {term['term']} ({term['credits']} credits):")
+        for c in term["courses"]:
+            why = f"  [{'; '.join(c['counts_toward'])}]" if c["counts_toward"] else ""
+            lines.append(f"  {c['code']:<11} {c['units']} cr{why}")
+    if result["complete"]:
+        lines.append(f"All plannable requirements met in {len(result['terms'])} term(s).")
+    else:
+        unmet = result["unmet"]
+        lines.append("Roadmap incomplete; still missing: "
+                     + ", ".join(unmet["business_core_missing"] + unmet["magis_unmet"]["orientation"]
+                                 + unmet["magis_unmet"]["exploration"]))
+    if result["unplannable"]:
+        lines.append("Not offered in this catalog: " + ", ".join(result["unplannable"]))
+    return lines
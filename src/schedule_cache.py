@@ -0,0 +1,272 @@
+# schedule_cache.py
+"""
+Result cache for build_schedule.
+
+Results are keyed on (catalog version, canonical parsed prefs, completed
+course set, mode/budget), so "15 credits, prefer Tu/Th, avoid Friday" and
+"Avoid Friday; prefer Tue/Thu, 15 credits" with the same transcript share an
+entry. Two tiers:
+
+  memory  per-process LRU (ScheduleCache(maxsize=...))
+  disk    optional SQLite file shared by processes (db_path=...), entries
+          expire after `ttl` seconds and the oldest-used beyond `max_rows`
+          are evicted
+
+Entries for any other catalog version are dropped the first time a new
+version is seen, so rebuilding or patching the tables invalidates the cache.
+Live seat refreshes (seat_feed) keep the version and drop just the entries a
+changed section can affect (invalidate_sections): those whose schedule uses
+it, and, when it opens up, those tied to its course (put(courses=...): the
+courses the request asked for or found with every section full).
+Catalogs without a version (built directly from frames) are never cached.
+"""
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from src.codes import canonical
+
+
+def _encode(o):
+    if isinstance(o, (set, frozenset)):
+        return {"__set__": sorted(o)}
+    raise TypeError(f"Not JSON serializable: {type(o).__name__}")
+
+
+def _decode(d):
+    return set(d["__set__"]) if len(d) == 1 and "__set__" in d else d
+
+
+def dumps(result, sort_keys=False) -> str:
+    return json.dumps(result, default=_encode, sort_keys=sort_keys, separators=(",", ":"))
+
+
+def loads(text: str):
+    return json.loads(text, object_hook=_decode)
+
+
+def request_key(version, prefs: dict, completed_codes, mode="greedy", time_budget=2.0) -> str:
+    """Stable digest of everything a schedule depends on."""
+    raw = dumps({
+        "version": version,
+        "prefs": prefs,
+        "completed": sorted({canonical(c) for c in completed_codes}),
+        "mode": mode,
+        # the greedy planner ignores the budget
+        "budget": time_budget if mode == "optimal" else None,
+    }, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def schedule_key(prefs: dict, completed_codes, catalog, mode="greedy", time_budget=2.0) -> str | None:
+    """request_key for a catalog, or None when the catalog has no version to invalidate on."""
+    if catalog.version is None:
+        return None
+    return request_key(catalog.version, prefs, completed_codes, mode, time_budget)
+
+
+class ScheduleCache:
+    def __init__(self, maxsize: int = 1024, db_path=None, ttl: float = 24 * 3600, max_rows: int = 100_000):
+        self.maxsize = maxsize
+        self.db_path = str(db_path) if db_path else None
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.stats = Counter({"hits": 0, "disk_hits": 0, "misses": 0})
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._by_section: dict[str, set[str]] = {}  # section_id → memory keys whose result uses it
+        self._by_course: dict[str, set[str]] = {}  # canonical code → memory keys tied to the course
+        self._courses: dict[str, tuple] = {}  # memory key → its courses
+        self._version = None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self):
+        # one connection per process: forked workers (batch, service) reconnect
+        if not self.db_path:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, version TEXT, created REAL,"
+                " accessed REAL, value TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS result_sections (key TEXT, section_id TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS result_sections_id ON result_sections (section_id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS result_courses (key TEXT, code TEXT)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS result_courses_code ON result_courses (code)")
+            self._pid = os.getpid()
+        return self._conn
+
+    # ---------- versioning ----------
+    def check_version(self, version) -> None:
+        """Drop everything cached for other catalog versions."""
+        tag = json.dumps(version, default=str)
+        with self._lock:
+            if tag == self._version:
+                return
+            self._version = tag
+            self._reset_memory()
+            db = self._db
+            if db is not None:
+                db.execute("DELETE FROM results WHERE version != ?", (tag,))
+                self._drop_orphans(db)
+            self.stats["invalidations"] += 1
+
+    def invalidate_sections(self, section_ids, courses=()) -> int:
+        """
+        Drop the entries whose schedule uses any of `section_ids`, or that are
+        tied to any of `courses` (codes, any spelling); returns how many were
+        dropped.
+        """
+        ids = list(dict.fromkeys(section_ids))
+        codes = list(dict.fromkeys(canonical(c) for c in courses))
+        with self._lock:
+            keys = set()
+            for sid in ids:
+                keys |= self._by_section.get(sid, set())
+            for code in codes:
+                keys |= self._by_course.get(code, set())
+            for key in keys:
+                self._forget(key)
+            db = self._db
+            if db is not None and (ids or codes):
+                for table, column, values in [("result_sections", "section_id", ids),
+                                              ("result_courses", "code", codes)]:
+                    for i in range(0, len(values), 500):  # stay under SQLite's bound-parameter limit
+                        chunk = values[i:i + 500]
+                        where = f"SELECT key FROM {table} WHERE {column} IN ({','.join('?' * len(chunk))})"
+                        keys.update(k for (k,) in db.execute(where, chunk))
+                        db.execute(f"DELETE FROM results WHERE key IN ({where})", chunk)
+                self._drop_orphans(db)
+            self.stats["section_invalidations"] += len(keys)
+            return len(keys)
+
+    # ---------- lookups ----------
+    def get(self, key: str):
+        """A private copy of the cached result, or None."""
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is not None:
+                self._lru.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(hit)
+            db = self._db
+            if db is not None:
+                now = time.time()
+                row = db.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[0] <= self.ttl:
+                    db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                    result = loads(row[1])
+                    courses = [c for (c,) in db.execute("SELECT code FROM result_courses WHERE key = ?", (key,))]
+                    self._remember(key, result, courses)
+                    self.stats["disk_hits"] += 1
+                    return copy.deepcopy(result)
+                if row is not None:
+                    db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    db.execute("DELETE FROM result_sections WHERE key = ?", (key,))
+                    db.execute("DELETE FROM result_courses WHERE key = ?", (key,))
+                    self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, result: dict, courses=()) -> None:
+        """
+        Cache `result`. `courses` are the codes whose sections opening up could
+        change it though it uses none of them (requested, or found full).
+        """
+        result = copy.deepcopy(result)
+        courses = sorted({canonical(c) for c in courses})
+        with self._lock:
+            self._remember(key, result, courses)
+            db = self._db
+            if db is not None:
+                now = time.time()
+                db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                           (key, self._version, now, now, dumps(result)))
+                db.execute("DELETE FROM result_sections WHERE key = ?", (key,))
+                db.executemany("INSERT INTO result_sections VALUES (?, ?)",
+                               [(key, sid) for sid in result.get("sections", ())])
+                db.execute("DELETE FROM result_courses WHERE key = ?", (key,))
+                db.executemany("INSERT INTO result_courses VALUES (?, ?)", [(key, c) for c in courses])
+                self.stats["disk_writes"] += 1
+                if self.stats["disk_writes"] % 256 == 0:
+                    self._trim_disk(db, now)
+
+    def _remember(self, key, result, courses=()):
+        if key in self._lru:
+            self._forget(key)
+        self._lru[key] = result
+        for sid in result.get("sections", ()):
+            self._by_section.setdefault(sid, set()).add(key)
+        if courses:
+            self._courses[key] = tuple(courses)
+            for code in courses:
+                self._by_course.setdefault(code, set()).add(key)
+        while len(self._lru) > self.maxsize:
+            self._forget(next(iter(self._lru)))
+            self.stats["evictions"] += 1
+
+    def _forget(self, key):
+        result = self._lru.pop(key, None)
+        for index, ids in [(self._by_section, (result or {}).get("sections", ())),
+                           (self._by_course, self._courses.pop(key, ()))]:
+            for i in ids:
+                keys = index.get(i)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[i]
+
+    def _reset_memory(self):
+        self._lru.clear()
+        self._by_section.clear()
+        self._by_course.clear()
+        self._courses.clear()
+
+    @staticmethod
+    def _drop_orphans(db):
+        db.execute("DELETE FROM result_sections WHERE key NOT IN (SELECT key FROM results)")
+        db.execute("DELETE FROM result_courses WHERE key NOT IN (SELECT key FROM results)")
+
+    def _trim_disk(self, db, now):
+        db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        extra = db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_rows
+        if extra > 0:
+            db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                       (extra,))
+            self.stats["disk_evictions"] += extra
+        self._drop_orphans(db)
+
+    # ---------- housekeeping ----------
+    def clear(self) -> None:
+        with self._lock:
+            self._reset_memory()
+            db = self._db
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.execute("DELETE FROM result_sections")
+                db.execute("DELETE FROM result_courses")
+
+    def info(self) -> dict:
+        """Hit/miss counters plus current sizes."""
+        looked = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        info = {**self.stats, "lookups": looked, "size": len(self._lru),
+                "hit_rate": (self.stats["hits"] + self.stats["disk_hits"]) / looked if looked else 0.0}
+        if self.db_path:
+            with self._lock:
+                info["disk_size"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return info
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
@@ -0,0 +1,170 @@
+# seat_feed.py
+"""
+Live seat refresh without a rebuild.
+
+A seat feed is a small batch of per-section updates, as JSON lines or CSV,
+one record per section:
+
+    {"section_id": "ACCT 1011-01 - Intro to Financial Accounting", "seats_taken": 34, "status": "Closed"}
+
+with any of capacity, seats_taken ("enrolled" works too), status,
+waitlist_capacity and waitlist_count. refresh_seats() turns the records
+that change something into parse_courses-style change-log updates, patches
+the cached catalog in place (Catalog.apply_changes, which keeps open_rows
+current) and drops the cached schedules it can change: those using a
+changed section, and for a section that opened, those that wanted its
+course and couldn't place it ("all sections full"). The tables on disk are
+left alone, so the catalog version, and every other cached schedule, stays
+valid.
+
+A local file stands in for the registrar; fake_feed() makes one up:
+
+    python -m src.seat_feed FEED [--service URL]    show (or send) what a feed changes
+    python -m src.seat_feed --fake 50 -o seats.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+
+from src.catalog import PATCHABLE_FIELDS, TEXT_FIELDS, load_catalog, patch_catalog
+from src.paths import COURSES_CSV, SECTIONS_CSV
+
+ALIASES = {"enrolled": "seats_taken"}
+
+
+def read_feed(source, name=None) -> list[dict]:
+    """
+    Feed records from a .csv or JSON-lines file, or from such a file's bytes
+    (an upload) with `name` telling which format it is.
+    """
+    if isinstance(source, bytes):
+        text = source.decode("utf-8-sig")
+    else:
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            text = f.read()
+    if str(name or source).lower().endswith(".csv"):
+        return [dict(r) for r in csv.DictReader(io.StringIO(text, newline=""))]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def seat_changes(catalog, feed) -> tuple[list[dict], list[str]]:
+    """
+    (change-log updates for the records that change a section, section ids
+    the catalog doesn't have). Later records for a section win.
+    """
+    latest, unknown = {}, []
+    for rec in feed:
+        sid = str(rec.get("section_id") or "").strip()
+        if sid not in catalog.section_rows:
+            unknown.append(sid)
+            continue
+        fields = latest.setdefault(sid, {})
+        for name, value in rec.items():
+            name = ALIASES.get(name, name)
+            if name in PATCHABLE_FIELDS and value not in (None, ""):
+                fields[name] = str(value).strip() if name in TEXT_FIELDS else int(float(value))
+    changes = []
+    for sid, fields in latest.items():
+        rec = catalog.records[catalog.section_rows[sid]]
+        diff = {f: [getattr(rec, f), v] for f, v in fields.items() if getattr(rec, f) != v}
+        if diff:
+            changes.append({"op": "update", "table": "sections", "key": sid, "fields": diff})
+    return changes, unknown
+
+
+def refresh_seats(feed, courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV, cache=None) -> dict:
+    """
+    Apply a seat feed (records, or a file path) to the loaded catalog for
+    these tables, and drop the entries of `cache` (a ScheduleCache) that use
+    a changed section or wanted the course of one that opened. Returns
+    {"updated", "unknown", "opened", "closed", "invalidated", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    if isinstance(feed, (str, os.PathLike)):
+        feed = read_feed(feed)
+    catalog = load_catalog(courses_csv, sections_csv)
+    changes, unknown = seat_changes(catalog, feed)
+    rows = [catalog.section_rows[c["key"]] for c in changes]
+    was_open = catalog.open_rows[rows].copy()
+    # previous=version: if the tables were rebuilt meanwhile, the next load picks the new ones up instead
+    if changes and not patch_catalog(changes, courses_csv, sections_csv, previous=catalog.version):
+        raise RuntimeError("Catalog changed while refreshing seats; reload and apply the feed again")
+    now_open = catalog.open_rows[rows]
+    opened = [row for row, now, was in zip(rows, now_open, was_open) if now and not was]
+    invalidated = 0
+    if cache is not None:
+        # the new seats can serve requests whose cached schedules never touched the section
+        invalidated = cache.invalidate_sections((c["key"] for c in changes),
+                                                courses={catalog.records[row].code for row in opened})
+    return {
+        "updated": len(changes),
+        "unknown": unknown,
+        "opened": len(opened),
+        "closed": int((was_open & ~now_open).sum()),
+        "invalidated": invalidated,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def fake_feed(catalog, n: int = 50, seed: int = 0) -> list[dict]:
+    """
+    Registration traffic for `n` random sections: a few more seats taken,
+    closing the section when it fills, and now and then a closed one
+    reopening with room (a seat cap raised).
+    """
+    rng = random.Random(seed)
+    out = []
+    for row in rng.sample(range(len(catalog.records)), min(n, len(catalog.records))):
+        rec = catalog.records[row]
+        if rec.status == "Canceled":
+            continue
+        if catalog.open_rows[row]:
+            taken = min(rec.capacity, rec.seats_taken + rng.randint(1, 5))
+            out.append({"section_id": rec.section_id, "seats_taken": taken,
+                        "status": "Closed" if taken >= rec.capacity else rec.status})
+        elif rng.random() < 0.3:
+            out.append({"section_id": rec.section_id, "capacity": rec.seats_taken + rng.randint(1, 5),
+                        "status": "Open"})
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.seat_feed", description="Apply or preview a seat feed.")
+    parser.add_argument("feed", nargs="?", help="JSON-lines or CSV seat feed")
+    parser.add_argument("--service", metavar="URL", help="Send the feed to a running planning service (/refresh).")
+    parser.add_argument("--fake", type=int, metavar="N", help="Make up a feed for N random sections instead.")
+    parser.add_argument("--out", "-o", help="With --fake: write the feed here (JSON lines) instead of applying it.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--courses", default=str(COURSES_CSV))
+    parser.add_argument("--sections", default=str(SECTIONS_CSV))
+    args = parser.parse_args(argv)
+    if (args.feed is None) == (args.fake is None):
+        parser.error("give a feed file or --fake N")
+
+    catalog = load_catalog(args.courses, args.sections)
+    feed = fake_feed(catalog, args.fake, args.seed) if args.fake is not None else read_feed(args.feed)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for rec in feed:
+                f.write(json.dumps(rec) + "\n")
+        print(f"Wrote {len(feed)} records to {args.out}.")
+        return 0
+    if args.service:
+        from src.service import PlannerClient
+
+        stats = PlannerClient(args.service).refresh_seats(feed)
+    else:
+        # no long-lived catalog here to refresh: patch this process's copy to show the effect
+        stats = refresh_seats(feed, args.courses, args.sections)
+    print(f"{stats['updated']} sections updated ({stats['opened']} opened, {stats['closed']} closed), "
+          f"{len(stats['unknown'])} unknown, {stats['invalidated']} cached schedules dropped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
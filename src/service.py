@@ -0,0 +1,381 @@
+# service.py
+"""
+Long-running local planning service: the catalog stays loaded and warm,
+requests are JSON over HTTP.
+
+    python -m src.service [--port 8765] [--workers N]
+
+    GET  /health     {"ok": true, "catalog": <version>}
+    GET  /stats      request, coalesced, error and result-cache counts
+    POST /schedule   {"request", "completed", "mode", "time_budget", "profile"} → build_schedule result
+    POST /schedules  {"request", "completed", "k", "time_budget"} → ranked list (iter_schedules)
+    POST /progress   {"completed"} → progress_report
+    POST /roadmap    {"completed", "min_credits", "max_credits", "max_terms", "time_budget"} → plan_roadmap
+    POST /refresh    {"feed": [seat records]} → seat_feed.refresh_seats stats
+
+Planning runs in a process pool (forked after the catalog is loaded, so the
+workers share it copy-on-write) and never blocks the event loop. Identical
+requests arriving while one is in flight share its result instead of being
+planned twice, and finished /schedule results are kept in a ScheduleCache
+(optionally backed by SQLite, --cache). A seat refresh patches the parent's
+catalog, drops the cached results it can change and restarts the
+pool, so new workers fork from the refreshed catalog.
+PlannerClient is the matching stdlib client (used by the app).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from src.batch import json_default
+from src.catalog import load_catalog
+from src.codes import canonical_codes
+from src.metrics import Metrics
+from src.nlparse import parse_request
+from src.paths import COURSES_CSV, SECTIONS_CSV
+from src.planner import build_schedule, iter_schedules, unplaced_courses
+from src.requirements import progress_report
+from src.roadmap import plan_roadmap
+from src.schedule_cache import ScheduleCache, schedule_key
+from src.seat_feed import refresh_seats
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1 << 20
+MAX_LINE = 8 << 10  # request line or one header line
+MAX_HEADERS = 100
+HEAD_TIMEOUT = 30.0  # seconds to send a request line and headers (idle keep-alive included)
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+# worker-side table paths; the catalog itself comes from load_catalog's cache
+_TABLES = (str(COURSES_CSV), str(SECTIONS_CSV))
+
+
+# ---------- work (runs in the pool) ----------
+def _init_worker(courses_csv, sections_csv):
+    global _TABLES
+    _TABLES = (courses_csv, sections_csv)
+    load_catalog(*_TABLES)  # no-op when forked with the cache already warm
+
+
+def completed_list(payload) -> list[str]:
+    value = payload.get("completed") or []
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(c, str) for c in value):
+        raise ValueError("'completed' must be a list of course codes or a comma-separated string")
+    return canonical_codes(value)
+
+
+def plan_one(payload: dict) -> dict:
+    return build_schedule(
+        payload.get("request") or "",
+        completed_codes=completed_list(payload),
+        catalog=load_catalog(*_TABLES),
+        mode=payload.get("mode", "greedy"),
+        time_budget=float(payload.get("time_budget", 2.0)),
+        metrics=Metrics() if payload.get("profile") else None,
+    )
+
+
+def plan_top(payload: dict) -> list[dict]:
+    return list(iter_schedules(
+        parse_request(payload.get("request") or ""),
+        completed_list(payload),
+        k=int(payload.get("k", 5)),
+        catalog=load_catalog(*_TABLES),
+        time_budget=float(payload.get("time_budget", 2.0)),
+    ))
+
+
+def progress_one(payload: dict) -> dict:
+    return progress_report(completed_list(payload), load_catalog(*_TABLES).annotated)
+
+
+def roadmap_one(payload: dict) -> dict:
+    return plan_roadmap(
+        completed_list(payload),
+        load_catalog(*_TABLES),
+        min_credits=int(payload.get("min_credits", 12)),
+        max_credits=int(payload.get("max_credits", 18)),
+        max_terms=int(payload.get("max_terms", 8)),
+        time_budget=float(payload.get("time_budget", 2.0)),
+    )
+
+
+ROUTES = {"/schedule": plan_one, "/schedules": plan_top, "/progress": progress_one, "/roadmap": roadmap_one}
+
+
+# ---------- service ----------
+class PlannerService:
+    def __init__(self, courses_csv=COURSES_CSV, sections_csv=SECTIONS_CSV, workers=None, cache_db=None):
+        self.tables = (str(courses_csv), str(sections_csv))
+        self.workers = workers or os.cpu_count() or 1
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.stats = Counter()
+        self.cache = ScheduleCache(db_path=cache_db)
+        self.pool = None
+        self.refreshing = None  # asyncio.Lock, made on the service's loop
+
+    def start_pool(self):
+        self.pool = self.make_pool()
+
+    def make_pool(self) -> ProcessPoolExecutor:
+        global _TABLES
+        _TABLES = self.tables
+        load_catalog(*self.tables)
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+        if ctx is not None:
+            # keep the shared catalog's pages untouched by the workers' GC passes
+            # (workers fork lazily, so the parent stays frozen for its lifetime)
+            gc.collect()
+            gc.freeze()
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                   initializer=_init_worker, initargs=self.tables)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        self.cache.close()
+
+    async def refresh(self, feed) -> dict:
+        """Apply a seat feed; workers forked before it hold stale seats, so the pool is replaced."""
+        # patching the catalog and building the pool run off the event loop, one refresh at a time
+        loop = asyncio.get_running_loop()
+        if self.refreshing is None:
+            self.refreshing = asyncio.Lock()
+        async with self.refreshing:
+            stats = await loop.run_in_executor(None, refresh_seats, feed, *self.tables, self.cache)
+            if stats["updated"] and self.pool is not None:
+                old, self.pool = self.pool, await loop.run_in_executor(None, self.make_pool)
+                old.shutdown(wait=False)  # requests already running there finish on the old seats
+        self.stats["refreshes"] += 1
+        return stats
+
+    async def catalog(self):
+        # after the tables change this is a full rebuild: keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, load_catalog, *self.tables)
+
+    async def cache_key(self, path: str, payload: dict) -> str | None:
+        # only plain /schedule results are cached; profiled runs always plan
+        if path != "/schedule" or payload.get("profile"):
+            return None
+        catalog = await self.catalog()
+        key = schedule_key(parse_request(payload.get("request") or ""), completed_list(payload), catalog,
+                           payload.get("mode", "greedy"), float(payload.get("time_budget", 2.0)))
+        if key is not None:
+            self.cache.check_version(catalog.version)
+        return key
+
+    async def run(self, path: str, payload: dict):
+        """Result for one request; identical concurrent requests share one computation."""
+        cache_key = await self.cache_key(path, payload)
+        if cache_key is not None:
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                return hit
+        key = path + json.dumps(payload, sort_keys=True, default=str)
+        fut = self.inflight.get(key)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self.pool, ROUTES[path], payload)
+        self.inflight[key] = fut
+        fut.add_done_callback(lambda _: self.inflight.pop(key, None))
+        result = await asyncio.shield(fut)
+        if cache_key is not None:
+            self.cache.put(cache_key, result, courses=unplaced_courses(await self.catalog(), result))
+        return result
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+        if path == "/health":
+            catalog = await self.catalog()
+            return 200, {"ok": True, "catalog": catalog.version, "workers": self.workers}
+        if path == "/stats":
+            return 200, {**self.stats, "inflight": len(self.inflight), "cache": self.cache.info()}
+        if path == "/refresh" and method == "POST":
+            try:
+                feed = json.loads(body or b"{}").get("feed") or []
+                return 200, await self.refresh(feed)
+            except (ValueError, AttributeError, RuntimeError) as e:
+                return 400, {"error": f"Bad seat feed: {e}"}
+        if path not in ROUTES:
+            return 404, {"error": f"No endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": f"{path} expects POST"}
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Body must be a JSON object"}
+        self.stats["requests"] += 1
+        t0 = time.perf_counter()
+        try:
+            result = await self.run(path, payload)
+        except ValueError as e:
+            self.stats["errors"] += 1
+            return 400, {"error": str(e)}
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        self.stats["busy_ms"] += round((time.perf_counter() - t0) * 1000)
+        return 200, result
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection: HTTP/1.1 requests until the client closes or asks to."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(self.read_head(reader), HEAD_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError as e:  # line or header count over the limits
+                    await self.respond(writer, 431, {"error": str(e)}, keep_alive=False)
+                    break
+                if head is None:
+                    break
+                line, headers = head
+                try:
+                    method, target, version = line.decode("latin1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Invalid Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (version == "HTTP/1.1") != (headers.get("connection", "").lower() == "close")
+                status, data = await self.dispatch(method.upper(), target.split("?", 1)[0], body)
+                await self.respond(writer, status, data, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_head(reader: asyncio.StreamReader):
+        """(request line, headers) of the next request, or None at EOF; ValueError past the limits."""
+        async def readline():
+            try:
+                return await reader.readline()
+            except ValueError:  # longer than the stream's limit (MAX_LINE)
+                raise ValueError(f"Request line or header longer than {MAX_LINE} bytes") from None
+
+        line = await readline()
+        if not line:
+            return None
+        headers, count = {}, 0
+        while (h := await readline()) not in (b"\r\n", b"\n", b""):
+            count += 1
+            if count > MAX_HEADERS:
+                raise ValueError(f"More than {MAX_HEADERS} header lines")
+            name, _, value = h.decode("latin1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return line, headers
+
+    @staticmethod
+    async def respond(writer, status: int, data, keep_alive: bool):
+        body = json.dumps(data, default=json_default).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, ready=None):
+        self.start_pool()
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+# ---------- client ----------
+class PlannerClient:
+    """Blocking JSON client for a running service (e.g. PlannerClient("http://127.0.0.1:8765"))."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def call(self, path: str, payload: dict | None = None):
+        data = None if payload is None else json.dumps(payload, default=json_default).encode("utf-8")
+        req = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.load(resp)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.load(e).get("error", str(e))) from None
+
+    def health(self) -> dict:
+        return self.call("/health")
+
+    def build_schedule(self, user_text, completed_codes=None, mode="greedy", time_budget=2.0, profile=False):
+        return self.call("/schedule", {"request": user_text, "completed": completed_codes or [], "mode": mode,
+                                       "time_budget": time_budget, "profile": profile})
+
+    def top_schedules(self, user_text, completed_codes=None, k=5, time_budget=2.0):
+        return self.call("/schedules", {"request": user_text, "completed": completed_codes or [], "k": k,
+                                        "time_budget": time_budget})
+
+    def progress(self, completed_codes):
+        return self.call("/progress", {"completed": completed_codes})
+
+    def refresh_seats(self, feed: list[dict]) -> dict:
+        return self.call("/refresh", {"feed": feed})
+
+    def roadmap(self, completed_codes, min_credits=12, max_credits=18, max_terms=8, time_budget=2.0):
+        return self.call("/roadmap", {"completed": completed_codes, "min_credits": min_credits,
+                                      "max_credits": max_credits, "max_terms": max_terms,
+                                      "time_budget": time_budget})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.service", description="Local JSON planning service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Planner processes (default: all cores).")
+    parser.add_argument("--courses", default=str(COURSES_CSV))
+    parser.add_argument("--sections", default=str(SECTIONS_CSV))
+    parser.add_argument("--cache", metavar="DB", help="SQLite file to keep schedule results in across restarts.")
+    args = parser.parse_args(argv)
+
+    service = PlannerService(args.courses, args.sections, args.workers, args.cache)
+
+    def ready(server):
+        addr = server.sockets[0].getsockname()
+        print(f"Planning service on http://{addr[0]}:{addr[1]} ({service.workers} workers).", file=sys.stderr)
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
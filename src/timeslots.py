@@ -0,0 +1,52 @@
+# timeslots.py
+"""
+Weekly occupancy bitsets for sections.
+
+A section's meetings are encoded once as a Python int with one bit per
+5-minute slot per day (7 × 288 bits). Two sections conflict iff their masks
+share a bit, and "does this conflict with my schedule?" is a single AND
+against the OR of everything already chosen.
+"""
+from functools import lru_cache
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_ORDER = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+DAY_BITS = {d: 1 << i for i, d in enumerate(DAY_ORDER)}
+
+
+# ---------- parsing ----------
+def day_mask(days) -> int:
+    s = str(days)
+    return sum(DAY_BITS.get(s[i:i+2], 0) for i in range(0, len(s) - 1, 2))
+
+
+def to_minutes(t) -> int:
+    # "HH:MM" → minutes after midnight; -1 for blank/TBA
+    s = str(t)
+    if ":" not in s:
+        return -1
+    h, m = s.split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+# ---------- encoding ----------
+@lru_cache(maxsize=4096)
+def occupancy(dmask: int, start: int, end: int) -> int:
+    """Bitset for a meeting on the days in `dmask` from `start` to `end` (minutes)."""
+    if dmask == 0 or start < 0 or end <= start:
+        return 0
+    # off-grid times round outward, so a conflict is never missed
+    lo = start // SLOT_MINUTES
+    hi = -(-end // SLOT_MINUTES)
+    run = ((1 << (hi - lo)) - 1) << lo
+    mask = 0
+    for i in range(len(DAY_ORDER)):
+        if dmask >> i & 1:
+            mask |= run << (i * SLOTS_PER_DAY)
+    return mask
+
+
+def conflicts(mask: int, schedule_mask: int) -> bool:
+    return (mask & schedule_mask) != 0
+
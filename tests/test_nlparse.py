@@ -0,0 +1,27 @@
+# test_nlparse.py
+import pytest
+
+from src.nlparse import parse_request
+
+
+@pytest.mark.parametrize("text, avoid, preferred", [
+    ("avoid mondays, tuesdays are fine", {"Mo"}, {"Tu"}),
+    ("no classes on Mondays, Wednesday afternoons ok", {"Mo"}, {"We"}),
+    ("no classes on fridays", {"Fr"}, set()),
+    ("avoid Mo Tu and Fridays", {"Mo", "Tu", "Fr"}, set()),
+])
+def test_day_runs_end_at_clause_punctuation(text, avoid, preferred):
+    prefs = parse_request(text)
+    assert prefs["avoid_days"] == avoid
+    assert prefs["preferred_days"] == preferred
+
+
+@pytest.mark.parametrize("text, earliest, latest", [
+    ("classes after 10am", "10:00", None),
+    ("start later than 10am", "10:00", None),
+    ("no classes after 5pm", None, "17:00"),
+    ("finish by 5pm, no classes before 9:30", "09:30", "17:00"),
+])
+def test_time_bounds(text, earliest, latest):
+    prefs = parse_request(text)
+    assert (prefs["earliest_start"], prefs["latest_end"]) == (earliest, latest)
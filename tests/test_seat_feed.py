@@ -0,0 +1,59 @@
+# test_seat_feed.py
+import shutil
+
+import pytest
+
+from src.catalog import load_catalog
+from src.paths import COURSES_CSV, SECTIONS_CSV
+from src.planner import build_schedule
+from src.schedule_cache import ScheduleCache
+from src.seat_feed import refresh_seats
+
+REQUEST = "15 credits, include AHST 1003"
+
+
+@pytest.fixture
+def tables(tmp_path):
+    # private copies: refresh_seats patches the loaded catalog for these paths in place
+    courses, sections = tmp_path / "courses.csv", tmp_path / "sections.csv"
+    shutil.copy(COURSES_CSV, courses)
+    shutil.copy(SECTIONS_CSV, sections)
+    return courses, sections
+
+
+def ahst_1003(catalog):
+    return [rec for rec in catalog.records if rec.code_id == catalog.code_table.get("AHST1003")]
+
+
+def test_opening_a_section_drops_results_that_wanted_its_course(tables):
+    catalog = load_catalog(*tables)
+    sections = ahst_1003(catalog)
+    assert sections and not any(catalog.open_rows[rec.row] for rec in sections)
+    cache = ScheduleCache()
+    full = build_schedule(REQUEST, catalog=catalog, cache=cache)
+    assert "No section fits for requested AHST1003 (all sections full)." in full["reasons"]
+    build_schedule("15 credits", catalog=catalog, cache=cache)
+
+    stats = refresh_seats([{"section_id": sections[0].section_id, "status": "Open", "capacity": 999}],
+                          *tables, cache=cache)
+    assert (stats["opened"], stats["invalidated"]) == (1, 1)
+    assert cache.info()["size"] == 1  # the request that never wanted AHST 1003 stays cached
+
+    fresh = build_schedule(REQUEST, catalog=load_catalog(*tables))
+    cached = build_schedule(REQUEST, catalog=load_catalog(*tables), cache=cache)
+    assert cached == fresh
+    assert "Included requested AHST1003." in cached["reasons"]
+
+
+def test_closing_a_section_drops_only_results_using_it(tables):
+    catalog = load_catalog(*tables)
+    cache = ScheduleCache()
+    used = build_schedule("15 credits", catalog=catalog, cache=cache)
+    build_schedule("12 credits, avoid Friday", catalog=catalog, cache=cache)
+    other = build_schedule("12 credits, avoid Friday", catalog=catalog)
+    only_used = [sid for sid in used["sections"] if sid not in other["sections"]]
+    assert only_used
+
+    stats = refresh_seats([{"section_id": only_used[0], "status": "Closed"}], *tables, cache=cache)
+    assert (stats["closed"], stats["invalidated"]) == (1, 1)
+    assert cache.info()["size"] == 1